@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 import asyncio
+import concurrent.futures
+import functools
 import json
 import logging
 import os
+import subprocess
 from pathlib import Path
-from typing import Any, Optional, List, Dict, Union
+from typing import Any, Awaitable, Callable, Optional, List, Dict, Union, get_args, get_origin
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, TypeAdapter
 
+# The log format below does not use thread/process fields, so skip collecting them per record.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -53,126 +61,296 @@ class FuzzArguments(BaseModel):
     log_level: Optional[str] = Field(None, alias="log-level", description="Log level: trace, debug, info, warn, error, or panic")
 
     def to_flags(self) -> List[str]:
-        flags = []
-        for field_name, value in self.dict(by_alias=True, exclude_none=True).items():
-            if field_name in ["workspace", "timeout", "verbosity"]:
+        values = self.__dict__
+        flags: List[str] = []
+        append = flags.append
+        for field_name, flag, kind in _FLAG_TABLE:
+            value = values[field_name]
+            if value is None:
                 continue
-            if isinstance(value, bool):
-                if value: flags.append(f"--{field_name}")
-            elif isinstance(value, list):
-                flags.extend([f"--{field_name}", ",".join(map(str, value))])
+            if kind == _FLAG_BOOL:
+                if value: append(flag)
+            elif kind == _FLAG_LIST:
+                append(flag)
+                append(",".join(map(str, value)))
             else:
-                flags.extend([f"--{field_name}", str(value)])
-        
+                append(flag)
+                append(str(value))
+
         if self.verbosity and 1 <= self.verbosity <= 3:
-            flags.append("-" + "v" * self.verbosity)
+            append(_VERBOSITY_FLAGS[self.verbosity])
         if self.timeout:
             flags.extend(["--timeout", str(self.timeout)])
         return flags
 
+def _field_type(annotation: Any) -> type:
+    """Reduce a field annotation like Optional[List[str]] to its runtime type (list)."""
+    args = [a for a in get_args(annotation) if a is not type(None)]
+    base = args[0] if args else annotation
+    return get_origin(base) or base
+
+_FUZZ_SCHEMA = FuzzArguments.model_json_schema(by_alias=True)
+_FUZZ_TYPES: Dict[str, type] = {}
+for _name, _field in FuzzArguments.model_fields.items():
+    _FUZZ_TYPES[_name] = _field_type(_field.annotation)
+    if _field.alias:
+        _FUZZ_TYPES[_field.alias] = _FUZZ_TYPES[_name]
+_FUZZ_ALIASES = frozenset(_FUZZ_TYPES)
+
+# (field name, CLI flag, kind) for every field passed straight through to `medusa fuzz`;
+# workspace/timeout/verbosity are handled separately by to_flags.
+_FLAG_BOOL, _FLAG_LIST, _FLAG_VALUE = 1, 2, 3
+_FLAG_TABLE = [
+    (
+        _name,
+        f"--{_field.alias or _name}",
+        {bool: _FLAG_BOOL, list: _FLAG_LIST}.get(_FUZZ_TYPES[_name], _FLAG_VALUE),
+    )
+    for _name, _field in FuzzArguments.model_fields.items()
+    if _name not in ("workspace", "timeout", "verbosity")
+]
+_VERBOSITY_FLAGS = ("", "-v", "-vv", "-vvv")
+
+def _parse_fuzz_args(arguments: Dict[str, Any]) -> FuzzArguments:
+    """Build FuzzArguments, skipping validation when every value already has the expected type."""
+    if arguments.keys() <= _FUZZ_ALIASES:
+        for key, value in arguments.items():
+            expected = _FUZZ_TYPES[key]
+            if type(value) is not expected:
+                break
+            if expected is list and not all(type(v) is str for v in value):
+                break
+        else:
+            return FuzzArguments.model_construct(**arguments)
+    return FuzzArguments.model_validate(arguments)
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+_OUTPUT_LIMIT = 10000
+_TRUNCATED_MARKER = "\n... [truncated] ...\n"
+
+async def _read_bounded(stream: asyncio.StreamReader, limit: int = _OUTPUT_LIMIT) -> str:
+    """Drain `stream`, keeping and decoding only its first and last limit/2 bytes."""
+    half = limit // 2
+    head = bytearray()
+    tail = bytearray()
+    truncated = False
+    while chunk := await stream.read(65536):
+        if len(head) < half:
+            take = half - len(head)
+            head += chunk[:take]
+            chunk = chunk[take:]
+        if chunk:
+            tail += chunk
+            if len(tail) > half:
+                del tail[:-half]
+                truncated = True
+    if not truncated:
+        head += tail
+        return head.decode(errors="replace")
+    return head.decode(errors="replace") + _TRUNCATED_MARKER + tail.decode(errors="replace")
+
+# fork/exec blocks the calling thread, so spawn off the event loop
+_SPAWN_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="medusa-spawn")
+
+async def _open_reader(loop: asyncio.AbstractEventLoop, pipe) -> tuple[asyncio.StreamReader, asyncio.BaseTransport]:
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader, transport
+
 async def _run_command(cmd: List[str], cwd: Path, timeout: float = 300.0) -> List[TextContent]:
+    loop = asyncio.get_running_loop()
+    transports = []
     try:
-        proc = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, cwd=cwd
+        proc = await loop.run_in_executor(
+            _SPAWN_EXECUTOR,
+            functools.partial(subprocess.Popen, cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd),
         )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
-        
-        def truncate(text: bytes, limit: int = 10000) -> str:
-            decoded = text.decode()
-            if len(decoded) <= limit: return decoded
-            half = limit // 2
-            return f"{decoded[:half]}\n... [truncated] ...\n{decoded[-half:]}"
+        try:
+            out_reader, out_transport = await _open_reader(loop, proc.stdout)
+            transports.append(out_transport)
+            err_reader, err_transport = await _open_reader(loop, proc.stderr)
+            transports.append(err_transport)
+            async with asyncio.timeout(timeout):
+                stdout, stderr, _ = await asyncio.gather(
+                    _read_bounded(out_reader),
+                    _read_bounded(err_reader),
+                    loop.run_in_executor(None, proc.wait),
+                )
+        except BaseException:
+            # Pipes already wrapped in a transport are closed in the outer finally
+            for pipe in (proc.stdout, proc.stderr)[len(transports):]:
+                pipe.close()
+            if proc.poll() is None:
+                proc.kill()
+                await loop.run_in_executor(None, proc.wait)
+            raise
 
         res = []
-        if stdout: res.append(TextContent(type="text", text=f"STDOUT:\n{truncate(stdout)}"))
-        if stderr: res.append(TextContent(type="text", text=f"STDERR:\n{truncate(stderr)}"))
+        if stdout: res.append(TextContent(type="text", text=f"STDOUT:\n{stdout}"))
+        if stderr: res.append(TextContent(type="text", text=f"STDERR:\n{stderr}"))
         return res
     except asyncio.TimeoutError:
         return [TextContent(type="text", text="Command timed out.")]
+    except FileNotFoundError as e:
+        # either the binary or the (cached) workspace is gone; re-check the workspace next time
+        _forget_cwd(cwd)
+        return [TextContent(type="text", text=f"Error: {e}")]
     except Exception as e:
         return [TextContent(type="text", text=f"Error: {e}")]
+    finally:
+        for transport in transports:
+            transport.close()
+
+# str(path) -> (st_mtime_ns, st_size, raw bytes, parsed config or None if not parsed yet)
+_CFG_CACHE: Dict[str, tuple[int, int, bytes, Optional[Dict[str, Any]]]] = {}
+
+def _load_cfg(cfg: Path, parse: bool = True) -> tuple[bytes, Optional[Dict[str, Any]]]:
+    """Return the raw (and parsed) medusa.json, re-reading only when the file changed."""
+    st = cfg.stat()
+    key = str(cfg)
+    hit = _CFG_CACHE.get(key)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        raw, data = hit[2], hit[3]
+    else:
+        raw, data = cfg.read_bytes(), None
+    if data is None and parse:
+        data = orjson.loads(raw)
+    _CFG_CACHE[key] = (st.st_mtime_ns, st.st_size, raw, data)
+    return raw, data
+
+# medusa.json sections are free-form, so only check that `updates` is a JSON object before any file I/O.
+_UPDATES_ADAPTER = TypeAdapter(Dict[str, Any])
+
+def _deep_update(dst: Dict[str, Any], src: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge `src` into `dst` in place; nested sections are merged into dicts owned by `dst`."""
+    stack = [(dst, src)]
+    while stack:
+        d, u = stack.pop()
+        for k, v in u.items():
+            if type(v) is dict:
+                sub = d.get(k)
+                if type(sub) is not dict:
+                    # fresh dict, so the cached config never aliases the caller's input
+                    sub = d[k] = {}
+                stack.append((sub, v))
+            else:
+                d[k] = v
+    return dst
+
+def _update_cfg(cfg: Path, apply) -> None:
+    """Apply `apply` to the cached config in place and write it back, keeping the cache in sync."""
+    key = str(cfg)
+    try:
+        _, data = _load_cfg(cfg)
+        data = apply(data)
+        # Keep the file's 4-space layout so updates diff cleanly; writes are rare
+        raw = json.dumps(data, indent=4).encode()
+        cfg.write_bytes(raw)
+    except Exception:
+        # the cached dict may be half-updated
+        _CFG_CACHE.pop(key, None)
+        raise
+    st = cfg.stat()
+    _CFG_CACHE[key] = (st.st_mtime_ns, st.st_size, raw, data)
 
-def _get_cwd(args: Dict) -> Path:
+# workspace argument -> (resolved directory, its medusa.json); entries are dropped when the directory disappears
+_CWD_CACHE: Dict[str, tuple[Path, Path]] = {}
+
+def _get_cwd(args: Dict) -> tuple[Path, Path]:
     ws = args.get("workspace") or args.get("path") or "."
+    hit = _CWD_CACHE.get(ws)
+    if hit is not None: return hit
     path = BASE_DIR / ws
     if not path.exists(): raise ValueError(f"Directory {path} does not exist")
-    return path
+    hit = _CWD_CACHE[ws] = (path, path / "medusa.json")
+    return hit
+
+def _forget_cwd(path: Path) -> None:
+    for ws in [ws for ws, cached in _CWD_CACHE.items() if cached[0] == path]:
+        del _CWD_CACHE[ws]
 
 # ---------------------------------------------------------------------------
 # Tool Registration
 # ---------------------------------------------------------------------------
 
+# Tool definitions are static, so build them once and share them across list calls.
+_TOOLS = [
+    Tool(
+        name="medusa_init",
+        description="Initialize Medusa in the current directory.",
+        inputSchema={"type": "object", "properties": {"workspace": {"type": "string"}}},
+    ),
+    Tool(
+        name="medusa_fuzz",
+        description="Run the Medusa fuzzing process.",
+        inputSchema=_FUZZ_SCHEMA,
+    ),
+    Tool(
+        name="medusa_get_config",
+        description="Read medusa.json.",
+        inputSchema={"type": "object", "properties": {"workspace": {"type": "string"}}},
+    ),
+    Tool(
+        name="medusa_update_config",
+        description="Update medusa.json fields.",
+        inputSchema={
+            "type": "object", 
+            "properties": {
+                "updates": {"type": "object"}, 
+                "workspace": {"type": "string"}
+            },
+            "required": ["updates"]
+        },
+    ),
+]
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
-    return [
-        Tool(
-            name="medusa_init",
-            description="Initialize Medusa in the current directory.",
-            inputSchema={"type": "object", "properties": {"workspace": {"type": "string"}}},
-        ),
-        Tool(
-            name="medusa_fuzz",
-            description="Run the Medusa fuzzing process.",
-            inputSchema=FuzzArguments.schema(),
-        ),
-        Tool(
-            name="medusa_get_config",
-            description="Read medusa.json.",
-            inputSchema={"type": "object", "properties": {"workspace": {"type": "string"}}},
-        ),
-        Tool(
-            name="medusa_update_config",
-            description="Update medusa.json fields.",
-            inputSchema={
-                "type": "object", 
-                "properties": {
-                    "updates": {"type": "object"}, 
-                    "workspace": {"type": "string"}
-                },
-                "required": ["updates"]
-            },
-        ),
-       
-    ]
+    return _TOOLS
+
+async def _handle_init(cwd: Path, cfg: Path, arguments: dict) -> list[TextContent]:
+    return await _run_command(["medusa", "init"], cwd)
+
+async def _handle_fuzz(cwd: Path, cfg: Path, arguments: dict) -> list[TextContent]:
+    args = _parse_fuzz_args(arguments)
+    timeout = float(args.timeout + 60) if args.timeout else 300.0
+    return await _run_command(["medusa", "fuzz"] + args.to_flags(), cwd, timeout)
+
+async def _handle_get_config(cwd: Path, cfg: Path, arguments: dict) -> list[TextContent]:
+    try:
+        raw, _ = _load_cfg(cfg, parse=False)
+    except FileNotFoundError:
+        return [TextContent(type="text", text="medusa.json not found. Run init first.")]
+    return [TextContent(type="text", text=raw.decode())]
+
+async def _handle_update_config(cwd: Path, cfg: Path, arguments: dict) -> list[TextContent]:
+    updates = _UPDATES_ADAPTER.validate_python(arguments.get("updates"))
+    try:
+        _update_cfg(cfg, lambda data: _deep_update(data, updates))
+    except FileNotFoundError:
+        return [TextContent(type="text", text="medusa.json not found.")]
+    return [TextContent(type="text", text="Updated successfully.")]
+
+_HANDLERS: Dict[str, Callable[[Path, Path, dict], Awaitable[list[TextContent]]]] = {
+    "medusa_init": _handle_init,
+    "medusa_fuzz": _handle_fuzz,
+    "medusa_get_config": _handle_get_config,
+    "medusa_update_config": _handle_update_config,
+}
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    try:
-        cwd = _get_cwd(arguments)
-        
-        if name == "medusa_init":
-            return await _run_command(["medusa", "init"], cwd)
-            
-        elif name == "medusa_fuzz":
-            args = FuzzArguments(**arguments)
-            timeout = float(args.timeout + 60) if args.timeout else 300.0
-            return await _run_command(["medusa", "fuzz"] + args.to_flags(), cwd, timeout)
-            
-        elif name == "medusa_get_config":
-            cfg = cwd / "medusa.json"
-            if not cfg.exists(): return [TextContent(type="text", text="medusa.json not found. Run init first.")]
-            return [TextContent(type="text", text=cfg.read_text())]
-            
-        elif name == "medusa_update_config":
-            cfg = cwd / "medusa.json"
-            if not cfg.exists(): return [TextContent(type="text", text="medusa.json not found.")]
-            data = json.loads(cfg.read_text())
-            def deep_update(d, u):
-                for k, v in u.items():
-                    if isinstance(v, dict): d[k] = deep_update(d.get(k, {}), v)
-                    else: d[k] = v
-                return d
-            cfg.write_text(json.dumps(deep_update(data, arguments["updates"]), indent=4))
-            return [TextContent(type="text", text="Updated successfully.")]
-            
+    handler = _HANDLERS.get(name)
+    if handler is None:
         return [TextContent(type="text", text=f"Unknown tool: {name}")]
-
+    try:
+        cwd, cfg = _get_cwd(arguments)
+        return await handler(cwd, cfg, arguments)
     except Exception as e:
-        logger.error(f"Error in {name}: {e}")
+        logger.error("Error in %s: %s", name, e)
         return [TextContent(type="text", text=f"Error: {e}")]
 
 async def main():
@@ -181,4 +359,9 @@ async def main():
         await app.run(r, w, app.create_initialization_options())
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -20,11 +20,15 @@ Tools:
 """
 
 import asyncio
-import json
+import codecs
+import contextlib
+import functools
 import logging
 import os, sys
 import shutil
-import uuid
+import secrets
+import stat
+from collections import OrderedDict, deque
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -32,6 +36,7 @@ from typing import Any
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Resource, TextContent, Tool
+import orjson
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -56,10 +61,19 @@ class Settings(BaseSettings):
     solazy_bin: str = Field(default="sol-azy", alias="SOLAZY_BIN")
     max_text_output: int = Field(default=20000, alias="SOLAZY_MAX_TEXT_OUTPUT")
     max_artifact_preview: int = Field(default=20000, alias="SOLAZY_MAX_ARTIFACT_PREVIEW")
+    max_history: int = Field(default=1000, alias="SOLAZY_MAX_HISTORY")
+    max_cached_previews: int = Field(default=16777216, alias="SOLAZY_MAX_CACHED_PREVIEWS") # 16M chars
+    max_inline_response: int = Field(default=32768, alias="SOLAZY_MAX_INLINE_RESPONSE")
+    reject_when_full: bool = Field(default=False, alias="SOLAZY_REJECT_WHEN_FULL")
 
 
 settings = Settings()
 
+# Artifact types whose contents are included in previews.
+PREVIEW_SUFFIXES = frozenset({".out", ".dot", ".md", ".json", ".txt"})
+# Upper bound (in files' worth of max_artifact_preview) on previews cached per run.
+MAX_CACHED_PREVIEW_FILES = 50
+
 
 class Artifact(BaseModel):
     path: str
@@ -78,36 +92,40 @@ class RunResult(BaseModel):
     stdout: str | None = None
     stderr: str | None = None
     error: str | None = None
+    # Cached by _artifact_previews once the run has finished.
+    artifact_previews: dict[str, str] | None = Field(default=None, exclude=True)
 
 
-run_results: dict[str, RunResult] = {}
+# Least recently used first; trimmed to settings.max_history by _evict_old_runs.
+run_results: OrderedDict[str, RunResult] = OrderedDict()
 active_runs: set[str] = set()
+# Run IDs in start order (oldest first), overall and per run_type, so list_runs can
+# walk newest-first and stop after `limit` matches instead of sorting every run.
+run_index: deque[str] = deque()
+run_index_by_type: dict[str, deque[str]] = {}
+# Characters of artifact previews currently cached on finished runs, across all of
+# run_results; kept within settings.max_cached_previews by _artifact_previews.
+_cached_preview_chars = 0
+# Admission control for sol-azy processes; active_runs is only used for reporting.
+_run_slots = asyncio.Semaphore(settings.max_concurrent)
 
 
 def _resolve(path_str: str) -> Path:
     return Path(path_str).expanduser().resolve(strict=False)
 
 
-def _is_allowed_path(p: Path) -> bool:
-    if settings.allow_any_path:
-        return True
-
-    upload_root = _resolve(settings.upload_dir)
-    output_root = _resolve(settings.output_dir)
+@functools.lru_cache(maxsize=None)
+def _allowed_roots() -> tuple[Path, Path]:
+    """Resolved (upload_dir, output_dir); settings do not change after startup."""
+    return _resolve(settings.upload_dir), _resolve(settings.output_dir)
 
-    try:
-        p.relative_to(upload_root)
-        return True
-    except ValueError:
-        pass
 
-    try:
-        p.relative_to(output_root)
+def _is_allowed_path(p: Path) -> bool:
+    if settings.allow_any_path:
         return True
-    except ValueError:
-        pass
 
-    return False
+    upload_root, output_root = _allowed_roots()
+    return p.is_relative_to(upload_root) or p.is_relative_to(output_root)
 
 
 def _validate_existing_path(path_str: str, *, expect_dir: bool | None = None) -> tuple[Path | None, str | None]:
@@ -120,71 +138,138 @@ def _validate_existing_path(path_str: str, *, expect_dir: bool | None = None) ->
             "Set SOLAZY_ALLOW_ANY_PATH=1 to disable this restriction."
         )
 
-    if not p.exists():
+    # One stat call answers existence, type and size.
+    try:
+        st = os.stat(p)
+    except OSError:
         return None, f"Path not found: {p}"
+    is_dir = stat.S_ISDIR(st.st_mode)
+    is_file = stat.S_ISREG(st.st_mode)
 
-    if expect_dir is True and not p.is_dir():
+    if expect_dir is True and not is_dir:
         return None, f"Expected a directory, got: {p}"
-    if expect_dir is False and not p.is_file():
+    if expect_dir is False and not is_file:
         return None, f"Expected a file, got: {p}"
 
-    if p.is_file():
-        try:
-            size = p.stat().st_size
-        except OSError:
-            size = 0
-        if size > settings.max_file_size:
-            return None, f"File too large ({size} bytes). Max: {settings.max_file_size} bytes."
+    if is_file and st.st_size > settings.max_file_size:
+        return None, f"File too large ({st.st_size} bytes). Max: {settings.max_file_size} bytes."
 
     return p, None
 
 
 def _collect_artifacts(root: Path) -> list[Artifact]:
+    # os.scandir serves the file type (and usually the size) from the directory entry,
+    # avoiding the separate is_file()/stat() calls of a Path.rglob walk.
     artifacts: list[Artifact] = []
-    if not root.exists():
-        return artifacts
-    for p in root.rglob("*"):
-        if not p.is_file():
-            continue
+    root_dir = os.fspath(root)
+    stack = [root_dir]
+    while stack:
+        current = stack.pop()
         try:
-            size = p.stat().st_size
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif current == root_dir and entry.name in SERVER_FILES:
+                        continue
+                    elif entry.is_file():
+                        try:
+                            size = entry.stat().st_size
+                        except OSError:
+                            size = 0
+                        artifacts.append(Artifact.model_construct(path=entry.path, size=size))
         except OSError:
-            size = 0
-        artifacts.append(Artifact(path=str(p), size=size))
+            continue
     artifacts.sort(key=lambda a: a.path)
     return artifacts
 
 
+_TRUNCATED = "\n...(truncated)...\n"
+
+
 def _read_text_preview(path: Path, max_chars: int) -> str:
+    # Read one byte past the limit to detect truncation without loading the whole file.
     try:
-        data = path.read_text(errors="replace")
+        with open(path, "rb") as f:
+            raw = f.read(max_chars + 1)
     except Exception as e:
         return f"(error reading {path}: {e})"
-    if len(data) <= max_chars:
-        return data
-    return data[:max_chars] + "\n...(truncated)...\n"
-
-
-async def _run_cmd(cmd: list[str], *, cwd: Path, timeout: int | None) -> tuple[int, str, str]:
-    env = os.environ.copy()
-    env.setdefault("RUST_LOG", "sol_azy=error")
-    env.setdefault("TERM", "dumb")
+    if len(raw) <= max_chars:
+        return raw.decode(errors="replace")
+    return raw[:max_chars].decode(errors="replace") + _TRUNCATED
+
+
+async def _read_capped(stream: asyncio.StreamReader | None, max_bytes: int) -> str:
+    """Read a subprocess pipe to EOF, decoding only the first `max_bytes` and discarding the rest."""
+    if stream is None:
+        return ""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts: list[str] = []
+    remaining = max_bytes
+    truncated = False
+    while chunk := await stream.read(65536):
+        if remaining <= 0:
+            truncated = True
+            continue
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            truncated = True
+        remaining -= len(chunk)
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    if truncated:
+        parts.append(_TRUNCATED)
+    return "".join(parts)
+
+
+# Files in the run directory that receive stdout/stderr when they are not captured in memory.
+STDOUT_LOG = "solazy-stdout.log"
+STDERR_LOG = "solazy-stderr.log"
+# Oversized run summaries are written here, also in the run directory.
+SUMMARY_FILE = "summary.json"
+# Files the server itself writes into a run directory; not sol-azy artifacts.
+SERVER_FILES = frozenset({STDOUT_LOG, STDERR_LOG, SUMMARY_FILE})
+
+# Environment for sol-azy subprocesses, built once; only PWD varies per run.
+_BASE_ENV = {
+    **os.environ,
+    "RUST_LOG": os.environ.get("RUST_LOG", "sol_azy=error"),
+    "TERM": os.environ.get("TERM", "dumb"),
+}
+
+
+async def _run_cmd(
+    cmd: list[str],
+    *,
+    cwd: Path,
+    timeout: int | None,
+    capture_stdout: bool = True,
+    capture_stderr: bool = True,
+) -> tuple[int, str, str]:
     # sol-azy `recap` uses $PWD to decide where to write `recap-solazy.md`.
-    env["PWD"] = str(cwd)
+    env = _BASE_ENV | {"PWD": str(cwd)}
 
     logger.debug("Running command: %s (cwd=%s)", " ".join(cmd), cwd)
 
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        cwd=str(cwd),
-        env=env,
-    )
+    # Streams that are not captured go straight to a log file in the run directory:
+    # the child writes there directly and nothing has to drain a pipe.
+    with contextlib.ExitStack() as logs:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE if capture_stdout else logs.enter_context(open(cwd / STDOUT_LOG, "wb")),
+            stderr=asyncio.subprocess.PIPE if capture_stderr else logs.enter_context(open(cwd / STDERR_LOG, "wb")),
+            cwd=str(cwd),
+            env=env,
+        )
 
+    # Drain both pipes concurrently but keep at most max_text_output bytes of each.
     try:
-        stdout_b, stderr_b = await asyncio.wait_for(
-            process.communicate(),
+        stdout, stderr, _ = await asyncio.wait_for(
+            asyncio.gather(
+                _read_capped(process.stdout, settings.max_text_output),
+                _read_capped(process.stderr, settings.max_text_output),
+                process.wait(),
+            ),
             timeout=float(timeout or settings.default_timeout),
         )
     except asyncio.TimeoutError:
@@ -192,13 +277,17 @@ async def _run_cmd(cmd: list[str], *, cwd: Path, timeout: int | None) -> tuple[i
             process.kill()
         except ProcessLookupError:
             pass
+        await process.wait()
         raise
 
-    stdout = (stdout_b or b"").decode(errors="replace")
-    stderr = (stderr_b or b"").decode(errors="replace")
     return int(process.returncode or 0), stdout, stderr
 
 
+def _dumps(obj: Any) -> str:
+    """Serialize a tool response; datetimes are emitted in ISO 8601 like isoformat()."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
 def _truncate(s: str | None, max_chars: int) -> str | None:
     if s is None:
         return None
@@ -207,7 +296,57 @@ def _truncate(s: str | None, max_chars: int) -> str | None:
     return s[:max_chars] + "\n...(truncated)...\n"
 
 
-def _format_run_summary(
+async def _read_log(result: RunResult, name: str) -> str | None:
+    log = Path(result.out_dir) / name
+    if not os.path.exists(log):
+        return None
+    return await asyncio.to_thread(_read_text_preview, log, settings.max_text_output)
+
+
+async def _artifact_previews(result: RunResult) -> dict[str, str]:
+    if result.artifact_previews is not None:
+        return result.artifact_previews
+
+    eligible: list[str] = []
+    for a in result.artifacts:
+        if a.size > settings.max_file_size or os.path.splitext(a.path)[1] not in PREVIEW_SUFFIXES:
+            continue
+        if os.path.exists(a.path):
+            eligible.append(a.path)
+    # Read the previews concurrently in worker threads instead of one by one on the event loop.
+    texts = await asyncio.gather(
+        *(asyncio.to_thread(_read_text_preview, Path(p), settings.max_artifact_preview) for p in eligible)
+    )
+    previews = dict(zip(eligible, texts))
+
+    # Artifacts no longer change once a run has finished, so keep its previews
+    # unless they would pin an unusually large amount of memory.
+    size = sum(map(len, texts))
+    if result.status != "running" and size <= settings.max_artifact_preview * MAX_CACHED_PREVIEW_FILES:
+        # Stay within the global budget by dropping the least recently used runs' previews.
+        for other in run_results.values():
+            if _cached_preview_chars + size <= settings.max_cached_previews:
+                break
+            _drop_artifact_previews(other)
+        if _cached_preview_chars + size <= settings.max_cached_previews:
+            _cache_artifact_previews(result, previews, size)
+    return previews
+
+
+def _cache_artifact_previews(result: RunResult, previews: dict[str, str], size: int) -> None:
+    global _cached_preview_chars
+    result.artifact_previews = previews
+    _cached_preview_chars += size
+
+
+def _drop_artifact_previews(result: RunResult) -> None:
+    global _cached_preview_chars
+    if result.artifact_previews is not None:
+        _cached_preview_chars -= sum(map(len, result.artifact_previews.values()))
+        result.artifact_previews = None
+
+
+async def _format_run_summary(
     result: RunResult,
     *,
     include_stdout: bool = False,
@@ -221,35 +360,62 @@ def _format_run_summary(
         "status": result.status,
         "command": result.command,
         "out_dir": result.out_dir,
-        "started_at": result.started_at.isoformat(),
-        "completed_at": result.completed_at.isoformat() if result.completed_at else None,
+        "started_at": result.started_at,
+        "completed_at": result.completed_at,
         "error": result.error,
     }
 
     if include_artifacts:
-        out["artifacts"] = [a.model_dump() for a in result.artifacts]
+        out["artifacts"] = [{"path": a.path, "size": a.size} for a in result.artifacts]
 
     if include_stdout:
         out["stdout"] = result.stdout
+        if result.stdout is None:
+            out["stdout"] = await _read_log(result, STDOUT_LOG)
     if include_stderr:
         out["stderr"] = result.stderr
+        if result.stderr is None:
+            out["stderr"] = await _read_log(result, STDERR_LOG)
 
     if include_artifact_previews:
-        previews: dict[str, str] = {}
-        for a in result.artifacts:
-            p = Path(a.path)
-            if not p.exists() or a.size > settings.max_file_size:
-                continue
-            if p.suffix in {".out", ".dot", ".md", ".json", ".txt"}:
-                previews[str(p)] = _read_text_preview(p, settings.max_artifact_preview)
-        out["artifact_previews"] = previews
+        out["artifact_previews"] = await _artifact_previews(result)
 
     return out
 
 
+async def _summary_response(summary: dict[str, Any]) -> list[TextContent]:
+    """Return a run summary inline, or write it to the run directory if it is too large."""
+    text = _dumps(summary)
+    if len(text) <= settings.max_inline_response:
+        return [TextContent(type="text", text=text)]
+
+    summary_path = Path(summary["out_dir"]) / SUMMARY_FILE
+    try:
+        await asyncio.to_thread(summary_path.write_text, text)
+    except OSError:
+        return [TextContent(type="text", text=text)]
+
+    compact = {
+        "run_id": summary["run_id"],
+        "run_type": summary["run_type"],
+        "status": summary["status"],
+        "out_dir": summary["out_dir"],
+        "error": summary["error"],
+        "summary_file": str(summary_path),
+        "see_resource": f"solazy://runs/{summary['run_id']}",
+        "note": f"Full response ({len(text)} chars) exceeded SOLAZY_MAX_INLINE_RESPONSE and was written to summary_file.",
+    }
+    return [TextContent(type="text", text=_dumps(compact))]
+
+
+def _new_run_id() -> str:
+    return secrets.token_hex(4)
+
+
 def _new_run(run_type: str, command: list[str], out_dir: Path) -> RunResult:
-    run_id = str(uuid.uuid4())[:8]
-    result = RunResult(
+    run_id = _new_run_id()
+    # All fields are produced locally, so skip pydantic validation.
+    result = RunResult.model_construct(
         run_id=run_id,
         run_type=run_type,
         command=command,
@@ -257,52 +423,81 @@ def _new_run(run_type: str, command: list[str], out_dir: Path) -> RunResult:
         started_at=datetime.now(),
     )
     run_results[run_id] = result
+    run_results.move_to_end(run_id)
+    run_index.append(run_id)
+    run_index_by_type.setdefault(run_type, deque()).append(run_id)
     return result
 
 
+def _evict_old_runs() -> None:
+    """Drop the least recently used finished runs once history exceeds settings.max_history."""
+    excess = len(run_results) - settings.max_history
+    if excess <= 0:
+        return
+    stale: list[str] = []
+    for run_id in run_results:
+        if run_id not in active_runs:
+            stale.append(run_id)
+            if len(stale) >= excess:
+                break
+    for run_id in stale:
+        _drop_artifact_previews(run_results.pop(run_id))
+
+    # The start-order indexes are pruned lazily: rebuild them once they are mostly stale.
+    if len(run_index) > 2 * len(run_results):
+        for index in (run_index, *run_index_by_type.values()):
+            live = [run_id for run_id in index if run_id in run_results]
+            index.clear()
+            index.extend(live)
+
+
 async def _run_solazy_job(
     run_type: str,
     args: list[str],
     *,
     timeout: int | None,
     cwd: Path,
+    capture_stdout: bool = True,
 ) -> RunResult:
-    if len(active_runs) >= settings.max_concurrent:
+    if settings.reject_when_full and _run_slots.locked():
         raise RuntimeError(f"Maximum concurrent runs ({settings.max_concurrent}) reached.")
 
-    cmd = [settings.solazy_bin, *args]
-    result = _new_run(run_type, cmd, cwd)
-    active_runs.add(result.run_id)
+    # Queue for a slot instead of failing when max_concurrent runs are in flight.
+    async with _run_slots:
+        cmd = [settings.solazy_bin, *args]
+        result = _new_run(run_type, cmd, cwd)
+        active_runs.add(result.run_id)
+        _evict_old_runs()
 
-    try:
-        rc, stdout, stderr = await _run_cmd(cmd, cwd=cwd, timeout=timeout)
-        result.completed_at = datetime.now()
-        result.stdout = _truncate(stdout, settings.max_text_output)
-        result.stderr = _truncate(stderr, settings.max_text_output)
-        result.artifacts = _collect_artifacts(cwd)
-
-        if rc == 0:
-            result.status = "completed"
-        else:
-            result.status = "failed"
-            if stderr.strip():
-                result.error = stderr.strip()[:2000]
+        try:
+            rc, stdout, stderr = await _run_cmd(cmd, cwd=cwd, timeout=timeout, capture_stdout=capture_stdout)
+            result.completed_at = datetime.now()
+            result.stdout = _truncate(stdout, settings.max_text_output) if capture_stdout else None
+            result.stderr = _truncate(stderr, settings.max_text_output)
+            result.artifacts = await asyncio.to_thread(_collect_artifacts, cwd)
+
+            if rc == 0:
+                result.status = "completed"
             else:
-                result.error = f"Command failed with exit code {rc}"
-
-    except asyncio.TimeoutError:
-        result.completed_at = datetime.now()
-        result.status = "timeout"
-        result.error = f"Timed out after {timeout or settings.default_timeout} seconds"
-
-    except Exception as e:
-        result.completed_at = datetime.now()
-        result.status = "error"
-        result.error = str(e)
-
-    finally:
-        active_runs.discard(result.run_id)
-        run_results[result.run_id] = result
+                result.status = "failed"
+                if stderr.strip():
+                    result.error = stderr.strip()[:2000]
+                else:
+                    result.error = f"Command failed with exit code {rc}"
+
+        except asyncio.TimeoutError:
+            result.completed_at = datetime.now()
+            result.status = "timeout"
+            result.error = f"Timed out after {timeout or settings.default_timeout} seconds"
+
+        except Exception as e:
+            result.completed_at = datetime.now()
+            result.status = "error"
+            result.error = str(e)
+
+        finally:
+            active_runs.discard(result.run_id)
+            run_results[result.run_id] = result
 
     return result
 
@@ -480,7 +675,7 @@ async def list_tools() -> list[Tool]:
 @app.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     try:
-        output_root = _resolve(settings.output_dir)
+        _, output_root = _allowed_roots()
         output_root.mkdir(parents=True, exist_ok=True)
 
         if name == "solazy_reverse":
@@ -488,7 +683,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             if err:
                 return [TextContent(type="text", text=err)]
 
-            run_dir = output_root / f"reverse_{str(uuid.uuid4())[:8]}"
+            run_dir = output_root / f"reverse_{_new_run_id()}"
             run_dir.mkdir(parents=True, exist_ok=True)
 
             mode = arguments.get("mode", "both")
@@ -513,22 +708,23 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             if only_entrypoint:
                 args.append("--only-entrypoint")
 
-            result = await _run_solazy_job("reverse", args, timeout=timeout, cwd=run_dir)
-            summary = _format_run_summary(
+            # Reverse results only report artifacts; stderr is still captured for error messages.
+            result = await _run_solazy_job("reverse", args, timeout=timeout, cwd=run_dir, capture_stdout=False)
+            summary = await _format_run_summary(
                 result,
                 include_stdout=False,
                 include_stderr=False,
                 include_artifacts=True,
                 include_artifact_previews=bool(arguments.get("include_artifact_previews", False)),
             )
-            return [TextContent(type="text", text=json.dumps(summary, indent=2))]
+            return await _summary_response(summary)
 
         if name == "solazy_sast":
             target_dir, err = _validate_existing_path(arguments["target_dir"], expect_dir=True)
             if err:
                 return [TextContent(type="text", text=err)]
 
-            run_dir = output_root / f"sast_{str(uuid.uuid4())[:8]}"
+            run_dir = output_root / f"sast_{_new_run_id()}"
             run_dir.mkdir(parents=True, exist_ok=True)
 
             rules_dir = arguments.get("rules_dir")
@@ -551,21 +747,21 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                 args.append("--no-internal-rules")
 
             result = await _run_solazy_job("sast", args, timeout=timeout, cwd=run_dir)
-            summary = _format_run_summary(
+            summary = await _format_run_summary(
                 result,
                 include_stdout=True,
                 include_stderr=True,
                 include_artifacts=True,
                 include_artifact_previews=False,
             )
-            return [TextContent(type="text", text=json.dumps(summary, indent=2))]
+            return await _summary_response(summary)
 
         if name == "solazy_recap":
             anchor_dir, err = _validate_existing_path(arguments["anchor_dir"], expect_dir=True)
             if err:
                 return [TextContent(type="text", text=err)]
 
-            run_dir = output_root / f"recap_{str(uuid.uuid4())[:8]}"
+            run_dir = output_root / f"recap_{_new_run_id()}"
             run_dir.mkdir(parents=True, exist_ok=True)
 
             timeout = arguments.get("timeout")
@@ -574,7 +770,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             args = ["recap", "-d", str(anchor_dir)]
             result = await _run_solazy_job("recap", args, timeout=timeout, cwd=run_dir)
 
-            summary = _format_run_summary(
+            summary = await _format_run_summary(
                 result,
                 include_stdout=True,
                 include_stderr=True,
@@ -584,14 +780,14 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
 
             recap_path = run_dir / "recap-solazy.md"
             if include_markdown and recap_path.exists():
-                summary["recap_markdown_preview"] = _read_text_preview(
-                    recap_path, settings.max_artifact_preview
+                summary["recap_markdown_preview"] = await asyncio.to_thread(
+                    _read_text_preview, recap_path, settings.max_artifact_preview
                 )
 
-            return [TextContent(type="text", text=json.dumps(summary, indent=2))]
+            return await _summary_response(summary)
 
         if name == "solazy_fetcher":
-            run_dir = output_root / f"fetcher_{str(uuid.uuid4())[:8]}"
+            run_dir = output_root / f"fetcher_{_new_run_id()}"
             run_dir.mkdir(parents=True, exist_ok=True)
 
             program_id = arguments["program_id"]
@@ -603,14 +799,14 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                 args += ["-r", rpc_url]
 
             result = await _run_solazy_job("fetcher", args, timeout=timeout, cwd=run_dir)
-            summary = _format_run_summary(
+            summary = await _format_run_summary(
                 result,
                 include_stdout=True,
                 include_stderr=True,
                 include_artifacts=True,
                 include_artifact_previews=False,
             )
-            return [TextContent(type="text", text=json.dumps(summary, indent=2))]
+            return await _summary_response(summary)
 
         if name == "solazy_dotting":
             config_path, err = _validate_existing_path(arguments["config_path"], expect_dir=False)
@@ -625,16 +821,19 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             if err:
                 return [TextContent(type="text", text=err)]
 
-            run_dir = output_root / f"dotting_{str(uuid.uuid4())[:8]}"
+            run_dir = output_root / f"dotting_{_new_run_id()}"
             run_dir.mkdir(parents=True, exist_ok=True)
 
             # Work on copies so we never write into uploads/mounted dirs.
             cfg_copy = run_dir / config_path.name
             reduced_copy = run_dir / reduced_dot.name
             full_copy = run_dir / full_dot.name
-            shutil.copy2(config_path, cfg_copy)
-            shutil.copy2(reduced_dot, reduced_copy)
-            shutil.copy2(full_dot, full_copy)
+            # .dot files can be large; copy them in parallel and off the event loop.
+            await asyncio.gather(
+                asyncio.to_thread(shutil.copy2, config_path, cfg_copy),
+                asyncio.to_thread(shutil.copy2, reduced_dot, reduced_copy),
+                asyncio.to_thread(shutil.copy2, full_dot, full_copy),
+            )
 
             timeout = arguments.get("timeout")
             include_updated_dot = bool(arguments.get("include_updated_dot", False))
@@ -650,7 +849,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             ]
 
             result = await _run_solazy_job("dotting", args, timeout=timeout, cwd=run_dir)
-            summary = _format_run_summary(
+            summary = await _format_run_summary(
                 result,
                 include_stdout=True,
                 include_stderr=True,
@@ -660,47 +859,46 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
 
             updated = run_dir / f"updated_{reduced_copy.name}"
             if include_updated_dot and updated.exists():
-                summary["updated_dot_preview"] = _read_text_preview(
-                    updated, settings.max_artifact_preview
+                summary["updated_dot_preview"] = await asyncio.to_thread(
+                    _read_text_preview, updated, settings.max_artifact_preview
                 )
 
-            return [TextContent(type="text", text=json.dumps(summary, indent=2))]
+            return await _summary_response(summary)
 
         if name == "get_run_results":
             run_id = arguments["run_id"]
             result = run_results.get(run_id)
             if not result:
                 return [TextContent(type="text", text=f"Run '{run_id}' not found")]
+            run_results.move_to_end(run_id)
 
-            summary = _format_run_summary(
+            summary = await _format_run_summary(
                 result,
                 include_stdout=bool(arguments.get("include_stdout", False)),
                 include_stderr=bool(arguments.get("include_stderr", False)),
                 include_artifacts=bool(arguments.get("include_artifacts", True)),
                 include_artifact_previews=bool(arguments.get("include_artifact_previews", False)),
             )
-            return [TextContent(type="text", text=json.dumps(summary, indent=2))]
+            return await _summary_response(summary)
 
         if name == "list_runs":
             limit = int(arguments.get("limit", 50))
             filt_type = arguments.get("run_type")
             filt_status = arguments.get("status")
 
-            items = list(run_results.values())
-            items.sort(key=lambda r: r.started_at, reverse=True)
+            index = run_index_by_type.get(filt_type, ()) if filt_type else run_index
 
             out: list[dict[str, Any]] = []
-            for r in items:
-                if r.status == "running":
-                    continue
-                if filt_type and r.run_type != filt_type:
+            for run_id in reversed(index):
+                r = run_results.get(run_id)
+                if r is None or r.status == "running":
                     continue
                 if filt_status and r.status != filt_status:
                     continue
-                out.append(_format_run_summary(r, include_artifacts=False))
+                out.append(await _format_run_summary(r, include_artifacts=False))
                 if len(out) >= limit:
                     break
-            return [TextContent(type="text", text=json.dumps({"runs": out, "count": len(out)}, indent=2))]
+            return [TextContent(type="text", text=_dumps({"runs": out, "count": len(out)}))]
 
         if name == "list_active_runs":
             active = []
@@ -712,20 +910,19 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     {
                         "run_id": r.run_id,
                         "run_type": r.run_type,
-                        "started_at": r.started_at.isoformat(),
+                        "started_at": r.started_at,
                         "command": r.command,
                     }
                 )
             return [
                 TextContent(
                     type="text",
-                    text=json.dumps(
+                    text=_dumps(
                         {
                             "active_runs": active,
                             "count": len(active),
                             "max_concurrent": settings.max_concurrent,
-                        },
-                        indent=2,
+                        }
                     ),
                 )
             ]
@@ -760,8 +957,8 @@ async def read_resource(uri: str) -> str:
         run_id = uri.replace("solazy://runs/", "")
         result = run_results.get(run_id)
         if result:
-            return json.dumps(_format_run_summary(result, include_stdout=True, include_stderr=True), indent=2)
-    return json.dumps({"error": "Resource not found"})
+            return _dumps(await _format_run_summary(result, include_stdout=True, include_stderr=True))
+    return _dumps({"error": "Resource not found"})
 
 
 async def main() -> None:
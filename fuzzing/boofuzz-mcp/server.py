@@ -6,15 +6,17 @@ A Model Context Protocol server for network protocol fuzzing using Boofuzz.
 """
 
 import asyncio
-import json
 import logging
 import os
+import re
 import sys
 import uuid
+import weakref
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Awaitable, Callable
 
+import orjson
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
@@ -40,13 +42,85 @@ class Settings(BaseSettings):
 settings = Settings()
 app = Server("boofuzz-mcp")
 
-# In-memory tracking of running processes
-active_processes: dict[str, asyncio.subprocess.Process] = {}
+SCRIPT_DIR = Path(settings.script_dir)
+RESULTS_DIR = Path(settings.results_dir)
+
+# In-memory tracking of running processes; entries drop out once a process is released
+active_processes: weakref.WeakValueDictionary[str, asyncio.subprocess.Process] = weakref.WeakValueDictionary()
+
+
+# Anything other than alphanumerics (as str.isalnum() sees them), '_' or '-'
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w-]+")
+
+# Bytes of each stream kept in memory for the run summary
+OUTPUT_TAIL_BYTES = 8000
+ERROR_TAIL_BYTES = 2000
+STREAM_CHUNK_SIZE = 64 * 1024
+# Buffered log bytes flushed to disk per worker-thread write
+WRITE_BATCH_BYTES = 256 * 1024
+
+# Bytes read from each script when looking for its description header
+DESCRIPTION_HEADER_BYTES = 1024
+
+# Bytes returned per file, and files returned per session, by boofuzz_get_results
+RESULT_FILE_BYTES = 5000
+MAX_RESULT_FILES = 100
+
+
+async def stream_to_file(stream: asyncio.StreamReader, path: Path, tail_bytes: int) -> str:
+    """Copy a process stream to a log file, returning only its decoded tail."""
+    tail = bytearray()
+    pending = bytearray()
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await stream.read(STREAM_CHUNK_SIZE):
+            pending += chunk
+            if len(pending) >= WRITE_BATCH_BYTES:
+                await asyncio.to_thread(f.write, pending)
+                pending.clear()
+            tail += chunk
+            del tail[:-tail_bytes]
+        if pending:
+            await asyncio.to_thread(f.write, pending)
+    finally:
+        await asyncio.to_thread(f.close)
+    return tail.decode(errors="replace")
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result as indented JSON."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def _read_truncated(path: Path, limit: int) -> str:
+    """Read at most ``limit`` bytes of a file."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, limit).decode(errors="replace")
+    finally:
+        os.close(fd)
+
+
+def read_result_files(result_path: Path) -> tuple[dict[str, str], int]:
+    """Read the leading part of the files in a session directory, in name order.
+
+    Returns the files read and the number of entries left out past MAX_RESULT_FILES.
+    """
+    files = {}
+    omitted = 0
+    for f in sorted(result_path.iterdir()):
+        if len(files) >= MAX_RESULT_FILES:
+            omitted += 1
+            continue
+        try:
+            files[f.name] = _read_truncated(f, RESULT_FILE_BYTES) # Limit size
+        except OSError: pass
+    return files, omitted
 
 
 def sanitize_filename(name: str) -> str:
     """Sanitize a filename to prevent path traversal."""
-    safe = "".join(c for c in name if c.isalnum() or c in ('_', '-')).rstrip()
+    safe = _UNSAFE_FILENAME_RE.sub("", name)
     return safe if safe else "unnamed"
 
 
@@ -125,152 +199,174 @@ async def list_tools() -> list[Tool]:
     ]
 
 
-@app.call_tool()
-async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
-    """Handle tool calls."""
-    
-    if name == "boofuzz_create_script":
-        script_name = sanitize_filename(arguments.get("script_name", "unnamed"))
-        script_content = arguments.get("script_content")
-        description = arguments.get("description", "")
+async def _handle_create_script(arguments: dict[str, Any]) -> list[TextContent]:
+    script_name = sanitize_filename(arguments.get("script_name", "unnamed"))
+    script_content = arguments.get("script_content")
+    description = arguments.get("description", "")
 
-        if not script_content:
-            return [TextContent(type="text", text="Error: 'script_content' is required.")]
+    if not script_content:
+        return [TextContent(type="text", text="Error: 'script_content' is required.")]
 
-        try:
-            script_path = Path(settings.script_dir) / f"{script_name}.py"
-            script_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Add metadata header
-            full_content = f"# Description: {description}\n# Created: {datetime.now().isoformat()}\n\n{script_content}"
-            
-            with open(script_path, "w") as f:
-                f.write(full_content)
-            
-            return [TextContent(type="text", text=f"Script saved successfully: {script_path}")]
-        
-        except Exception as e:
-            logger.exception("Failed to save script")
-            return [TextContent(type="text", text=f"Error saving script: {str(e)}")]
-
-    elif name == "boofuzz_run_fuzzer":
-        script_name = sanitize_filename(arguments.get("script_name"))
-        target_host = arguments.get("target_host")
-        target_port = arguments.get("target_port")
-        timeout = arguments.get("timeout", 60)
-
-        script_path = Path(settings.script_dir) / f"{script_name}.py"
-        if not script_path.exists():
-            return [TextContent(type="text", text=f"Error: Script '{script_name}' not found.")]
-
-        session_id = str(uuid.uuid4())[:8]
-        result_path = Path(settings.results_dir) / session_id
-        result_path.mkdir(parents=True, exist_ok=True)
-
-        # Environment variables to pass target info to the script
-        env = os.environ.copy()
-        env["TARGET_HOST"] = str(target_host)
-        env["TARGET_PORT"] = str(target_port)
-        env["SESSION_ID"] = session_id
-        env["RESULTS_DIR"] = str(result_path)
-
-        cmd = [sys.executable, str(script_path)]
-        
-        logger.info(f"Starting fuzzer {session_id}: {' '.join(cmd)}")
+    try:
+        script_path = SCRIPT_DIR / f"{script_name}.py"
+        script_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Add metadata header
+        full_content = f"# Description: {description}\n# Created: {datetime.now().isoformat()}\n\n{script_content}"
+
+        await asyncio.to_thread(script_path.write_text, full_content)
+
+        return [TextContent(type="text", text=f"Script saved successfully: {script_path}")]
+
+    except Exception as e:
+        logger.exception("Failed to save script")
+        return [TextContent(type="text", text=f"Error saving script: {str(e)}")]
+
+
+async def _handle_run_fuzzer(arguments: dict[str, Any]) -> list[TextContent]:
+    script_name = sanitize_filename(arguments.get("script_name"))
+    target_host = arguments.get("target_host")
+    target_port = arguments.get("target_port")
+    timeout = arguments.get("timeout", 60)
+
+    script_path = SCRIPT_DIR / f"{script_name}.py"
+    if not script_path.exists():
+        return [TextContent(type="text", text=f"Error: Script '{script_name}' not found.")]
+
+    session_id = str(uuid.uuid4())[:8]
+    result_path = RESULTS_DIR / session_id
+    result_path.mkdir(parents=True, exist_ok=True)
+
+    # Environment variables to pass target info to the script
+    env = os.environ.copy()
+    env["TARGET_HOST"] = str(target_host)
+    env["TARGET_PORT"] = str(target_port)
+    env["SESSION_ID"] = session_id
+    env["RESULTS_DIR"] = str(result_path)
+
+    cmd = [sys.executable, str(script_path)]
+
+    logger.info(f"Starting fuzzer {session_id}: {' '.join(cmd)}")
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env
+        )
+
+        active_processes[session_id] = process
 
+        # Stream output to disk, waiting for completion or timeout
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                env=env
+            stdout_tail, stderr_tail, _ = await asyncio.wait_for(
+                asyncio.gather(
+                    stream_to_file(process.stdout, result_path / "stdout.log", OUTPUT_TAIL_BYTES),
+                    stream_to_file(process.stderr, result_path / "stderr.log", ERROR_TAIL_BYTES),
+                    process.wait(),
+                ),
+                timeout=timeout
             )
-            
-            active_processes[session_id] = process
 
-            # Wait for completion or timeout
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), 
-                    timeout=timeout
-                )
-                
-                # Save output
-                with open(result_path / "stdout.log", "w") as f:
-                    f.write(stdout.decode())
-                with open(result_path / "stderr.log", "w") as f:
-                    f.write(stderr.decode())
-
-                output_summary = stdout.decode()[-2000:] # Last 2000 chars
-                error_summary = stderr.decode()[-500:]
-
-                result_text = (
-                    f"Fuzzing session {session_id} completed.\n"
-                    f"Exit Code: {process.returncode}\n"
-                    f"Results saved to: {result_path}\n"
-                    f"Output snippet:\n{output_summary}\n"
-                )
-                if error_summary:
-                    result_text += f"\nErrors:\n{error_summary}"
-
-                return [TextContent(type="text", text=result_text)]
-
-            except asyncio.TimeoutError:
-                process.kill()
-                return [TextContent(type="text", text=f"Fuzzing session {session_id} timed out after {timeout}s. Process killed. Check partial results in {result_path}.")]
-
-        except Exception as e:
-            logger.exception("Execution failed")
-            return [TextContent(type="text", text=f"Execution error: {str(e)}")]
-        finally:
-            active_processes.pop(session_id, None)
-
-    elif name == "boofuzz_list_scripts":
-        scripts_path = Path(settings.script_dir)
-        scripts = []
-        if scripts_path.exists():
-            for f in scripts_path.glob("*.py"):
-                # Read first line description
-                desc = "No description"
-                try:
-                    with open(f, 'r') as file:
-                        first_line = file.readline()
-                        if first_line.startswith("# Description:"):
-                            desc = first_line.split(":", 1)[1].strip()
-                except: pass
-                
-                scripts.append({
-                    "name": f.stem,
-                    "file": str(f),
-                    "description": desc
-                })
-        
-        return [TextContent(type="text", text=json.dumps(scripts, indent=2))]
-
-    elif name == "boofuzz_get_results":
-        session_id = arguments.get("session_id")
-        result_path = Path(settings.results_dir) / session_id
-        
-        if not result_path.exists():
-            return [TextContent(type="text", text=f"Session {session_id} not found.")]
-
-        results = {"session_id": session_id, "files": {}}
-        for f in result_path.glob("*"):
+            output_summary = stdout_tail[-2000:] # Last 2000 chars
+            error_summary = stderr_tail[-500:]
+
+            result_text = (
+                f"Fuzzing session {session_id} completed.\n"
+                f"Exit Code: {process.returncode}\n"
+                f"Results saved to: {result_path}\n"
+                f"Output snippet:\n{output_summary}\n"
+            )
+            if error_summary:
+                result_text += f"\nErrors:\n{error_summary}"
+
+            return [TextContent(type="text", text=result_text)]
+
+        except asyncio.TimeoutError:
+            process.kill()
+            return [TextContent(type="text", text=f"Fuzzing session {session_id} timed out after {timeout}s. Process killed. Check partial results in {result_path}.")]
+
+    except Exception as e:
+        logger.exception("Execution failed")
+        return [TextContent(type="text", text=f"Execution error: {str(e)}")]
+
+
+def collect_scripts() -> list[dict[str, str]]:
+    """List saved scripts with the description from their header line."""
+    scripts = []
+    try:
+        entries = list(os.scandir(SCRIPT_DIR))
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        if not entry.name.endswith(".py") or not entry.is_file():
+            continue
+        # Read first line description
+        desc = "No description"
+        try:
+            fd = os.open(entry.path, os.O_RDONLY)
             try:
-                results["files"][f.name] = f.read_text()[:5000] # Limit size
-            except: pass
-        
-        return [TextContent(type="text", text=json.dumps(results, indent=2))]
+                head = os.read(fd, DESCRIPTION_HEADER_BYTES)
+            finally:
+                os.close(fd)
+            first_line = head.split(b"\n", 1)[0].decode("utf-8", "ignore")
+            if first_line.startswith("# Description:"):
+                desc = first_line.split(":", 1)[1].strip()
+        except OSError: pass
+
+        scripts.append({
+            "name": entry.name[:-3],
+            "file": entry.path,
+            "description": desc
+        })
+
+    return scripts
+
+
+async def _handle_list_scripts(arguments: dict[str, Any]) -> list[TextContent]:
+    scripts = await asyncio.to_thread(collect_scripts)
+    return [TextContent(type="text", text=_dumps(scripts))]
+
+
+async def _handle_get_results(arguments: dict[str, Any]) -> list[TextContent]:
+    session_id = arguments.get("session_id")
+    result_path = RESULTS_DIR / session_id
 
-    return [TextContent(type="text", text="Unknown tool.")]
+    if not result_path.exists():
+        return [TextContent(type="text", text=f"Session {session_id} not found.")]
+
+    files, omitted = await asyncio.to_thread(read_result_files, result_path)
+    results = {"session_id": session_id, "files": files}
+    if omitted:
+        results["omitted_files"] = omitted
+
+    return [TextContent(type="text", text=_dumps(results))]
+
+
+_HANDLERS: dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]] = {
+    "boofuzz_create_script": _handle_create_script,
+    "boofuzz_run_fuzzer": _handle_run_fuzzer,
+    "boofuzz_list_scripts": _handle_list_scripts,
+    "boofuzz_get_results": _handle_get_results,
+}
+
+
+@app.call_tool()
+async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Handle tool calls."""
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return [TextContent(type="text", text="Unknown tool.")]
+    return await handler(arguments)
 
 
 async def main():
     """Run the MCP server."""
     logger.info("Starting Boofuzz MCP Server")
     
-    Path(settings.script_dir).mkdir(parents=True, exist_ok=True)
-    Path(settings.results_dir).mkdir(parents=True, exist_ok=True)
+    SCRIPT_DIR.mkdir(parents=True, exist_ok=True)
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
     async with stdio_server() as (read_stream, write_stream):
         await app.run(read_stream, write_stream, app.create_initialization_options())
@@ -12,7 +12,7 @@ import os
 import shlex
 import tempfile
 from pathlib import Path
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
@@ -38,6 +38,8 @@ class Settings(BaseSettings):
 settings = Settings()
 app = Server("dharma-mcp")
 
+GRAMMAR_DIR = Path(settings.grammar_dir)
+
 
 async def run_dharma(grammar_path: str, count: int) -> tuple[str, str]:
     """
@@ -47,7 +49,7 @@ async def run_dharma(grammar_path: str, count: int) -> tuple[str, str]:
     p = Path(grammar_path)
     if not p.exists():
         # Try relative to grammar_dir
-        p = Path(settings.grammar_dir) / grammar_path
+        p = GRAMMAR_DIR / grammar_path
         if not p.exists():
             return "", f"Grammar file not found: {grammar_path}"
 
@@ -77,6 +79,29 @@ async def run_dharma(grammar_path: str, count: int) -> tuple[str, str]:
         return "", str(e)
 
 
+def _memfd_grammar(content: str) -> int | None:
+    """
+    Write a grammar to an anonymous in-memory file, returning its descriptor.
+
+    Returns None where memfd_create is unavailable so callers can fall back
+    to a temporary file on disk.
+    """
+    if not hasattr(os, "memfd_create"):
+        return None
+    try:
+        fd = os.memfd_create("dharma-grammar", os.MFD_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        data = memoryview(content.encode())
+        while data:
+            data = data[os.write(fd, data):]
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools."""
@@ -122,65 +147,84 @@ async def list_tools() -> list[Tool]:
     ]
 
 
-@app.call_tool()
-async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
-    """Handle tool calls."""
-    
-    if name == "dharma_generate":
-        grammar_path = arguments.get("grammar_path")
-        count = arguments.get("count", 1)
+async def _handle_generate(arguments: dict[str, Any]) -> list[TextContent]:
+    grammar_path = arguments.get("grammar_path")
+    count = arguments.get("count", 1)
 
-        if not grammar_path:
-            return [TextContent(type="text", text="Error: 'grammar_path' is required.")]
+    if not grammar_path:
+        return [TextContent(type="text", text="Error: 'grammar_path' is required.")]
 
-        stdout, stderr = await run_dharma(grammar_path, count)
+    stdout, stderr = await run_dharma(grammar_path, count)
 
-        if stderr and "error" in stderr.lower():
-            return [TextContent(type="text", text=f"Error: {stderr}")]
-        
-        if not stdout and stderr:
-             return [TextContent(type="text", text=f"Error: {stderr}")]
+    if stderr and "error" in stderr.lower():
+        return [TextContent(type="text", text=f"Error: {stderr}")]
 
-        return [TextContent(type="text", text=stdout)]
+    if not stdout and stderr:
+         return [TextContent(type="text", text=f"Error: {stderr}")]
 
-    elif name == "dharma_generate_custom":
-        grammar_content = arguments.get("grammar_content")
-        count = arguments.get("count", 1)
+    return [TextContent(type="text", text=stdout)]
 
-        if not grammar_content:
-            return [TextContent(type="text", text="Error: 'grammar_content' is required.")]
 
-        # Create a temporary file to store the custom grammar
-        tmp_file_path = None
-        try:
+async def _handle_generate_custom(arguments: dict[str, Any]) -> list[TextContent]:
+    grammar_content = arguments.get("grammar_content")
+    count = arguments.get("count", 1)
+
+    if not grammar_content:
+        return [TextContent(type="text", text="Error: 'grammar_content' is required.")]
+
+    # Keep the custom grammar in memory where possible, else in a temporary file
+    grammar_fd = None
+    tmp_file_path = None
+    try:
+        grammar_fd = _memfd_grammar(grammar_content)
+        if grammar_fd is not None:
+            # The child opens the anonymous file through this process's fd table
+            grammar_path = f"/proc/{os.getpid()}/fd/{grammar_fd}"
+        else:
             # Create a temp file with .dg suffix so dharma recognizes it
             with tempfile.NamedTemporaryFile(mode='w', suffix='.dg', delete=False) as tmp:
                 tmp.write(grammar_content)
                 tmp_file_path = tmp.name
-            
+            grammar_path = tmp_file_path
+
             logger.info(f"Generated temporary grammar file: {tmp_file_path}")
 
-            # Run dharma using the temp file
-            stdout, stderr = await run_dharma(tmp_file_path, count)
+        # Run dharma using the in-memory or temp file
+        stdout, stderr = await run_dharma(grammar_path, count)
+
+        if stderr and "error" in stderr.lower():
+            return [TextContent(type="text", text=f"Error: {stderr}")]
+
+        if not stdout and stderr:
+             return [TextContent(type="text", text=f"Error: {stderr}")]
 
-            if stderr and "error" in stderr.lower():
-                return [TextContent(type="text", text=f"Error: {stderr}")]
-            
-            if not stdout and stderr:
-                 return [TextContent(type="text", text=f"Error: {stderr}")]
+        return [TextContent(type="text", text=stdout)]
+
+    except Exception as e:
+        logger.exception("Error processing custom grammar")
+        return [TextContent(type="text", text=f"Error processing custom grammar: {str(e)}")]
+    finally:
+        if grammar_fd is not None:
+            os.close(grammar_fd)
+        # Clean up the temporary file
+        if tmp_file_path and os.path.exists(tmp_file_path):
+            os.unlink(tmp_file_path)
+            logger.info(f"Cleaned up temporary file: {tmp_file_path}")
 
-            return [TextContent(type="text", text=stdout)]
 
-        except Exception as e:
-            logger.exception("Error processing custom grammar")
-            return [TextContent(type="text", text=f"Error processing custom grammar: {str(e)}")]
-        finally:
-            # Clean up the temporary file
-            if tmp_file_path and os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
-                logger.info(f"Cleaned up temporary file: {tmp_file_path}")
+_HANDLERS: dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]] = {
+    "dharma_generate": _handle_generate,
+    "dharma_generate_custom": _handle_generate_custom,
+}
 
-    return [TextContent(type="text", text=f"Unknown tool: {name}")]
+
+@app.call_tool()
+async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Handle tool calls."""
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+    return await handler(arguments)
 
 
 async def main():
@@ -188,7 +232,7 @@ async def main():
     logger.info("Starting Dharma MCP Server")
     logger.info(f"Grammar directory: {settings.grammar_dir}")
     
-    Path(settings.grammar_dir).mkdir(parents=True, exist_ok=True)
+    GRAMMAR_DIR.mkdir(parents=True, exist_ok=True)
 
     async with stdio_server() as (read_stream, write_stream):
         await app.run(read_stream, write_stream, app.create_initialization_options())
@@ -6,24 +6,42 @@ Extracts data from README.md, docker-compose.yml, and individual MCP READMEs
 to generate a searchable, filterable documentation website.
 """
 
-import json
 import os
 import re
+import shutil
 import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
+    import orjson
     import yaml
-    from jinja2 import Environment, FileSystemLoader
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 except ImportError:
-    print("Missing dependencies. Install with: pip install pyyaml jinja2")
+    print("Missing dependencies. Install with: pip install pyyaml jinja2 orjson")
     sys.exit(1)
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 
 # Project paths
 PROJECT_ROOT = Path(__file__).parent.parent
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 OUTPUT_DIR = PROJECT_ROOT / "docs"
+# Local build cache; kept out of OUTPUT_DIR so it is never published
+CACHE_DIR = PROJECT_ROOT / ".cache"
+
+# Category headers like "### Reconnaissance (8 servers)" and their table rows
+_CAT_RE = re.compile(r'^### (.+?) \((\d+) servers?\)', re.M)
+_ROW_RE = re.compile(r'^\| \[([^\]\n]+)\]\(([^)\n]+)\) \| ([^|\n]*) \| ([^|\n]+) \|', re.M)
+_EXT_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+_NON_DIGIT_RE = re.compile(r'[^\d]')
 
 
 def parse_readme_tables(readme_path: Path) -> dict:
@@ -31,49 +49,36 @@ def parse_readme_tables(readme_path: Path) -> dict:
     content = readme_path.read_text()
 
     servers = []
-    current_category = None
-
-    # Find category headers and their tables
-    lines = content.split('\n')
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-
-        # Match category headers like "### Reconnaissance (8 servers)"
-        category_match = re.match(r'^### (.+?) \((\d+) servers?\)', line)
-        if category_match:
-            current_category = category_match.group(1)
-            i += 1
-            continue
-
-        # Match table rows
-        if current_category and line.startswith('| ['):
-            # Parse: | [name](./path) | tools | description |
-            match = re.match(r'\| \[([^\]]+)\]\(([^)]+)\) \| ([^|]*) \| ([^|]+) \|', line)
-            if match:
-                name = match.group(1)
-                path = match.group(2).strip('./')
-                tools = match.group(3).strip()
-                description = match.group(4).strip()
-
-                # Extract external link if present
-                ext_link_match = re.search(r'\[([^\]]+)\]\(([^)]+)\)', description)
-                external_url = ext_link_match.group(2) if ext_link_match else None
-
-                # Clean description (remove markdown links)
-                clean_desc = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', description)
-
-                servers.append({
-                    'name': name,
-                    'path': path,
-                    'category': current_category,
-                    'tools_count': tools if tools and tools != '-' else None,
-                    'description': clean_desc,
-                    'external_url': external_url,
-                    'is_wrapper': 'Wrapper' in description or 'wrapper' in description,
-                })
-
-        i += 1
+
+    # Each category header owns the table rows up to the next header
+    headers = list(_CAT_RE.finditer(content))
+    for idx, category_match in enumerate(headers):
+        current_category = category_match.group(1)
+        end = headers[idx + 1].start() if idx + 1 < len(headers) else len(content)
+
+        # Parse: | [name](./path) | tools | description |
+        for match in _ROW_RE.finditer(content, category_match.end(), end):
+            name = match.group(1)
+            path = match.group(2).strip('./')
+            tools = match.group(3).strip()
+            description = match.group(4).strip()
+
+            # Extract external link if present
+            ext_link_match = _EXT_LINK_RE.search(description)
+            external_url = ext_link_match.group(2) if ext_link_match else None
+
+            # Clean description (remove markdown links)
+            clean_desc = _MD_LINK_RE.sub(r'\1', description)
+
+            servers.append({
+                'name': name,
+                'path': path,
+                'category': current_category,
+                'tools_count': tools if tools and tools != '-' else None,
+                'description': clean_desc,
+                'external_url': external_url,
+                'is_wrapper': 'Wrapper' in description or 'wrapper' in description,
+            })
 
     return servers
 
@@ -81,7 +86,7 @@ def parse_readme_tables(readme_path: Path) -> dict:
 def parse_docker_compose(compose_path: Path) -> dict:
     """Parse service details from docker-compose.yml."""
     content = compose_path.read_text()
-    data = yaml.safe_load(content)
+    data = yaml.load(content, Loader=_YamlLoader)
 
     services = {}
     for name, config in data.get('services', {}).items():
@@ -100,53 +105,84 @@ def parse_docker_compose(compose_path: Path) -> dict:
     return services
 
 
-def parse_mcp_readme(readme_path: Path) -> dict:
-    """Parse individual MCP README for tool details."""
-    if not readme_path.exists():
+def load_parse_cache(cache_path: Path) -> dict:
+    """Load cached MCP README parse results, or an empty cache."""
+    try:
+        cache = orjson.loads(cache_path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
         return {}
+    return cache if isinstance(cache, dict) else {}
 
-    content = readme_path.read_text()
 
-    # Extract tools from table
+def save_parse_cache(cache_path: Path, cache: dict) -> None:
+    """Atomically write MCP README parse results for the next run."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    tmp_path.write_bytes(orjson.dumps(cache))
+    os.replace(tmp_path, cache_path)
+
+
+def parse_mcp_readme(readme_path: Path, cache: dict | None = None) -> dict:
+    """Parse individual MCP README for tool details.
+
+    When a cache dict is given, results are reused while the README's
+    mtime and size are unchanged, and fresh results are stored back.
+    """
+    try:
+        st = readme_path.stat()
+    except FileNotFoundError:
+        return {}
+
+    key = str(readme_path)
+    stamp = [st.st_mtime_ns, st.st_size]
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None and cached.get('stamp') == stamp:
+            return cached['details']
+
+    details = _parse_mcp_readme_content(readme_path.read_text())
+    if cache is not None:
+        cache[key] = {'stamp': stamp, 'details': details}
+    return details
+
+
+def _parse_mcp_readme_content(content: str) -> dict:
+    """Extract the tools and environment variable tables from README text."""
+    # Extract tools and environment variables from their tables in one pass
     tools = []
+    env_vars = []
     in_tools_table = False
+    in_env_table = False
     for line in content.split('\n'):
+        is_row = line.startswith('|')
+        is_separator = line.startswith('|---')
+
         if '| Tool ' in line or '| Name ' in line:
             in_tools_table = True
-            continue
-        if in_tools_table:
-            if line.startswith('|---'):
-                continue
-            if not line.startswith('|'):
+        elif in_tools_table and not is_separator:
+            if not is_row:
                 in_tools_table = False
-                continue
-            # Parse tool row
-            parts = [p.strip() for p in line.split('|')[1:-1]]
-            if len(parts) >= 2:
-                tool_name = parts[0].strip('`')
-                tool_desc = parts[1] if len(parts) > 1 else ''
-                tools.append({'name': tool_name, 'description': tool_desc})
-
-    # Extract environment variables
-    env_vars = []
-    in_env_table = False
-    for line in content.split('\n'):
+            else:
+                # Parse tool row
+                parts = [p.strip() for p in line.split('|')[1:-1]]
+                if len(parts) >= 2:
+                    tool_name = parts[0].strip('`')
+                    tool_desc = parts[1] if len(parts) > 1 else ''
+                    tools.append({'name': tool_name, 'description': tool_desc})
+
         if '| Variable ' in line or '| Environment ' in line:
             in_env_table = True
-            continue
-        if in_env_table:
-            if line.startswith('|---'):
-                continue
-            if not line.startswith('|'):
+        elif in_env_table and not is_separator:
+            if not is_row:
                 in_env_table = False
-                continue
-            parts = [p.strip() for p in line.split('|')[1:-1]]
-            if len(parts) >= 2:
-                env_vars.append({
-                    'name': parts[0].strip('`'),
-                    'description': parts[1] if len(parts) > 1 else '',
-                    'required': 'required' in parts[2].lower() if len(parts) > 2 else False
-                })
+            else:
+                parts = [p.strip() for p in line.split('|')[1:-1]]
+                if len(parts) >= 2:
+                    env_vars.append({
+                        'name': parts[0].strip('`'),
+                        'description': parts[1] if len(parts) > 1 else '',
+                        'required': 'required' in parts[2].lower() if len(parts) > 2 else False
+                    })
 
     return {
         'tools': tools,
@@ -165,8 +201,16 @@ def generate_site():
     servers = parse_readme_tables(readme_path)
     docker_services = parse_docker_compose(compose_path)
 
+    # Read individual READMEs concurrently; they are small and I/O-bound
+    # Unchanged READMEs are served from the previous run's parse cache
+    cache_path = CACHE_DIR / 'docs_parse_cache.json'
+    cache = load_parse_cache(cache_path)
+    readme_paths = [PROJECT_ROOT / server['path'] / "README.md" for server in servers]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        details = list(executor.map(lambda path: parse_mcp_readme(path, cache), readme_paths))
+
     # Enrich server data with docker-compose and individual README info
-    for server in servers:
+    for server, mcp_details in zip(servers, details):
         service_name = server['name']
 
         # Add docker-compose info
@@ -174,8 +218,6 @@ def generate_site():
             server['docker'] = docker_services[service_name]
 
         # Add individual README info
-        readme_path = PROJECT_ROOT / server['path'] / "README.md"
-        mcp_details = parse_mcp_readme(readme_path)
         server.update(mcp_details)
 
         # Set tools_count from actual tools list if not already set
@@ -183,12 +225,10 @@ def generate_site():
             server['tools_count'] = len(server['tools'])
 
     # Group by category
-    categories = {}
+    categories = defaultdict(list)
     for server in servers:
-        cat = server['category']
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(server)
+        categories[server['category']].append(server)
+    categories = dict(categories)
 
     # Category metadata
     category_info = {
@@ -209,16 +249,22 @@ def generate_site():
     }
 
     # Setup Jinja2
-    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(),  # Reuse compiled templates across runs
+        auto_reload=False,
+    )
     template = env.get_template('index.html')
 
+    total_tools = sum(int(_NON_DIGIT_RE.sub('', str(s.get('tools_count') or '0')) or 0) for s in servers if s.get('tools_count'))
+
     # Render HTML
     html = template.render(
         servers=servers,
         categories=categories,
         category_info=category_info,
         total_servers=len(servers),
-        total_tools=sum(int(re.sub(r'[^\d]', '', str(s.get('tools_count') or '0')) or 0) for s in servers if s.get('tools_count')),
+        total_tools=total_tools,
     )
 
     # Create output directory
@@ -235,17 +281,17 @@ def generate_site():
     js_src = TEMPLATES_DIR / 'app.js'
 
     if css_src.exists():
-        (OUTPUT_DIR / 'css' / 'style.css').write_text(css_src.read_text())
+        shutil.copyfile(css_src, OUTPUT_DIR / 'css' / 'style.css')
         print(f"  Copied: {OUTPUT_DIR / 'css' / 'style.css'}")
 
     if js_src.exists():
-        (OUTPUT_DIR / 'js' / 'app.js').write_text(js_src.read_text())
+        shutil.copyfile(js_src, OUTPUT_DIR / 'js' / 'app.js')
         print(f"  Copied: {OUTPUT_DIR / 'js' / 'app.js'}")
 
     # Copy favicon
     favicon_src = TEMPLATES_DIR / 'favicon.svg'
     if favicon_src.exists():
-        (OUTPUT_DIR / 'favicon.svg').write_text(favicon_src.read_text())
+        shutil.copyfile(favicon_src, OUTPUT_DIR / 'favicon.svg')
         print(f"  Copied: {OUTPUT_DIR / 'favicon.svg'}")
 
     # Generate JSON data for API access
@@ -254,12 +300,16 @@ def generate_site():
         'categories': list(categories.keys()),
         'stats': {
             'total_servers': len(servers),
-            'total_tools': sum(int(re.sub(r'[^\d]', '', str(s.get('tools_count') or '0')) or 0) for s in servers if s.get('tools_count')),
+            'total_tools': total_tools,
         }
     }
-    (OUTPUT_DIR / 'data.json').write_text(json.dumps(json_data, indent=2))
+    (OUTPUT_DIR / 'data.json').write_bytes(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
     print(f"  Generated: {OUTPUT_DIR / 'data.json'}")
 
+    # Keep only entries for READMEs that are still referenced
+    live = {str(path) for path in readme_paths}
+    save_parse_cache(cache_path, {key: entry for key, entry in cache.items() if key in live})
+
     print(f"\nDone! Open {OUTPUT_DIR / 'index.html'} to view the site.")
 
 
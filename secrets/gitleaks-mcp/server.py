@@ -14,15 +14,18 @@ Tools:
 """
 
 import asyncio
-import json
+import itertools
 import logging
 import os
-import tempfile
-import uuid
+import secrets
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+import ijson
+import orjson
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -47,6 +50,7 @@ class Settings(BaseSettings):
     output_dir: str = Field(default="/app/output", alias="GITLEAKS_OUTPUT_DIR")
     default_timeout: int = Field(default=300, alias="GITLEAKS_TIMEOUT")
     max_concurrent_scans: int = Field(default=2, alias="GITLEAKS_MAX_CONCURRENT")
+    max_results: int = Field(default=128, alias="GITLEAKS_MAX_RESULTS")
 
     class Config:
         env_prefix = "GITLEAKS_"
@@ -55,8 +59,9 @@ class Settings(BaseSettings):
 settings = Settings()
 
 
-class SecretFinding(BaseModel):
-    """Model for a single secret finding."""
+@dataclass(slots=True)
+class SecretFinding:
+    """A single secret finding, built without validation from gitleaks output."""
 
     rule_id: str
     description: str | None = None
@@ -71,7 +76,7 @@ class SecretFinding(BaseModel):
     date: str | None = None
     message: str | None = None
     fingerprint: str | None = None
-    tags: list[str] = []
+    tags: list[str] = field(default_factory=list)
 
 
 class ScanResult(BaseModel):
@@ -83,53 +88,200 @@ class ScanResult(BaseModel):
     started_at: datetime
     completed_at: datetime | None = None
     status: str = "running"
+    # Only the first MAX_SUMMARY_FINDINGS; stats cover every finding
     findings: list[SecretFinding] = []
     stats: dict[str, Any] = {}
     error: str | None = None
     raw_output: str | None = None
 
 
-# In-memory storage for scan results
-scan_results: dict[str, ScanResult] = {}
+# Leading bytes of each raw report kept for get_scan_results(include_raw=True)
+RAW_OUTPUT_LIMIT = 10000
+REPORT_CHUNK_SIZE = 64 * 1024
+
+# File reported for findings from scan_content, which gitleaks reads on stdin
+STDIN_FILE = "<stdin>"
+
+# Findings kept as full rows per scan; format_scan_summary never shows more
+MAX_SUMMARY_FINDINGS = 50
+# Most frequent rules listed in stats; unique_rules_triggered still counts all
+MAX_RULES_BREAKDOWN = 20
+
+# In-memory storage for scan results, least recently used first;
+# trimmed to settings.max_results by _evict_old_scans.
+scan_results: OrderedDict[str, ScanResult] = OrderedDict()
 active_scans: set[str] = set()
 
+# Scans beyond the concurrency limit queue here instead of being rejected
+scan_slots = asyncio.Semaphore(settings.max_concurrent_scans)
+
+
+# Per-process prefix plus a counter: unique within this server, no entropy per scan
+_SCAN_ID_NONCE = secrets.token_hex(2)
+_scan_counter = itertools.count(1)
+
+
+def _new_scan_id() -> str:
+    return f"{_SCAN_ID_NONCE}{next(_scan_counter):04x}"
+
+
+def _evict_old_scans() -> None:
+    """Drop the least recently used finished scans once history exceeds settings.max_results."""
+    excess = len(scan_results) - settings.max_results
+    if excess <= 0:
+        return
+    stale: list[str] = []
+    for scan_id, result in scan_results.items():
+        # Queued and running scans are still awaited by their callers
+        if result.status != "running":
+            stale.append(scan_id)
+            if len(stale) >= excess:
+                break
+    for scan_id in stale:
+        del scan_results[scan_id]
+
+
+def parse_gitleaks_item(item: dict[str, Any]) -> SecretFinding:
+    """Convert one gitleaks JSON report entry into a finding."""
+    return SecretFinding(
+        rule_id=item.get("RuleID", "unknown"),
+        description=item.get("Description"),
+        secret=mask_secret(item.get("Secret", "")),
+        file=item.get("File"),
+        line=item.get("StartLine"),
+        start_column=item.get("StartColumn"),
+        end_column=item.get("EndColumn"),
+        commit=item.get("Commit"),
+        author=item.get("Author"),
+        email=item.get("Email"),
+        date=item.get("Date"),
+        message=item.get("Message"),
+        fingerprint=item.get("Fingerprint"),
+        tags=item.get("Tags", []),
+    )
+
+
+async def read_gitleaks_report(
+    stream: asyncio.StreamReader, result: ScanResult, default_file: str | None = None
+) -> None:
+    """
+    Incrementally parse a JSON report streamed on gitleaks' stdout into a result.
+
+    Findings, stats and the leading part of the raw report are filled in as
+    items arrive. The stream is always drained, even when the JSON turns out
+    to be malformed. Findings without a File (gitleaks stdin) are attributed
+    to default_file.
+    """
+    findings: list[SecretFinding] = []
+    total_findings = 0
+    rules_triggered: Counter[str] = Counter()
+    files_with_secrets: set[str] = set()
+    items = ijson.sendable_list()
+    parser = ijson.items_coro(items, "item", use_float=True)
+    head = bytearray()
+    parsing = True
+
+    def collect() -> None:
+        nonlocal total_findings
+        # Stats read only the rule and file of each item; full rows are
+        # built just for the findings a summary can show
+        for item in items:
+            total_findings += 1
+            rules_triggered[item.get("RuleID", "unknown")] += 1
+            file = item.get("File")
+            if not file and default_file:
+                file = item["File"] = default_file
+            if file:
+                files_with_secrets.add(file)
+            if len(findings) < MAX_SUMMARY_FINDINGS:
+                findings.append(parse_gitleaks_item(item))
+        del items[:]
+
+    while chunk := await stream.read(REPORT_CHUNK_SIZE):
+        if len(head) < RAW_OUTPUT_LIMIT:
+            head += chunk[:RAW_OUTPUT_LIMIT - len(head)]
+        if parsing:
+            try:
+                parser.send(chunk)
+            except ijson.JSONError:
+                logger.warning("Failed to parse gitleaks JSON output")
+                parsing = False
+            collect()
+
+    # An empty report means gitleaks produced nothing to parse
+    if parsing and head:
+        try:
+            parser.close()
+        except ijson.JSONError:
+            logger.warning("Failed to parse gitleaks JSON output")
+        collect()
+
+    result.findings = findings
+    result.raw_output = head.decode(errors="replace")
+    result.stats = {
+        "total_findings": total_findings,
+        "unique_rules_triggered": len(rules_triggered),
+        "files_with_secrets": len(files_with_secrets),
+        "rules_breakdown": dict(rules_triggered.most_common(MAX_RULES_BREAKDOWN)),
+    }
+
 
-def parse_gitleaks_json(output: str) -> list[SecretFinding]:
-    """Parse gitleaks JSON output into findings."""
-    findings = []
+async def execute_gitleaks(
+    cmd: list[str],
+    timeout: float,
+    result: ScanResult,
+    stdin_data: bytes | None = None,
+    default_file: str | None = None,
+) -> bytes:
+    """Run gitleaks with its report on stdout, filling in the result and returning stderr."""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if stdin_data is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    async def feed_stdin() -> None:
+        if stdin_data is None:
+            return
+        try:
+            process.stdin.write(stdin_data)
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # gitleaks exited early; its stderr explains why
+        finally:
+            process.stdin.close()
 
     try:
-        data = json.loads(output)
-        if isinstance(data, list):
-            for item in data:
-                finding = SecretFinding(
-                    rule_id=item.get("RuleID", "unknown"),
-                    description=item.get("Description"),
-                    secret=mask_secret(item.get("Secret", "")),
-                    file=item.get("File"),
-                    line=item.get("StartLine"),
-                    start_column=item.get("StartColumn"),
-                    end_column=item.get("EndColumn"),
-                    commit=item.get("Commit"),
-                    author=item.get("Author"),
-                    email=item.get("Email"),
-                    date=item.get("Date"),
-                    message=item.get("Message"),
-                    fingerprint=item.get("Fingerprint"),
-                    tags=item.get("Tags", []),
-                )
-                findings.append(finding)
-    except json.JSONDecodeError:
-        logger.warning("Failed to parse gitleaks JSON output")
+        _, stderr, _, _ = await asyncio.wait_for(
+            asyncio.gather(
+                read_gitleaks_report(process.stdout, result, default_file),
+                process.stderr.read(),
+                feed_stdin(),
+                process.wait(),
+            ),
+            timeout=timeout,
+        )
+    finally:
+        # However the read ended (timeout, cancel, malformed report), reap
+        # gitleaks before the caller gives its slot back
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    return stderr
+
 
-    return findings
+# Shared run of mask characters, sliced per secret instead of rebuilt
+_STARS = "*" * 4096
 
 
 def mask_secret(secret: str, visible_chars: int = 4) -> str:
     """Mask a secret, showing only first few characters."""
     if not secret or len(secret) <= visible_chars:
         return "****"
-    return secret[:visible_chars] + "*" * (len(secret) - visible_chars)
+    hidden = len(secret) - visible_chars
+    stars = _STARS[:hidden] if hidden <= len(_STARS) else "*" * hidden
+    return secret[:visible_chars] + stars
 
 
 async def run_gitleaks_scan(
@@ -139,17 +291,16 @@ async def run_gitleaks_scan(
     no_git: bool = False,
 ) -> ScanResult:
     """Execute a gitleaks scan asynchronously."""
-    scan_id = str(uuid.uuid4())[:8]
-    output_file = Path(settings.output_dir) / f"scan_{scan_id}.json"
+    scan_id = _new_scan_id()
 
-    result = ScanResult(
+    # All fields are produced locally, so skip pydantic validation
+    result = ScanResult.model_construct(
         scan_id=scan_id,
         target=target,
         scan_type=scan_type,
         started_at=datetime.now(),
     )
     scan_results[scan_id] = result
-    active_scans.add(scan_id)
 
     # Build gitleaks command
     cmd = [
@@ -157,7 +308,7 @@ async def run_gitleaks_scan(
         "detect",
         "--source", target,
         "--report-format", "json",
-        "--report-path", str(output_file),
+        "--report-path", "-",  # Stream the report on stdout
         "--exit-code", "0",  # Don't fail on findings
     ]
 
@@ -168,50 +319,21 @@ async def run_gitleaks_scan(
     logger.debug(f"Command: {' '.join(cmd)}")
 
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(),
-            timeout=float(timeout or settings.default_timeout),
-        )
+        # Wait for a free slot; held until gitleaks has exited
+        async with scan_slots:
+            active_scans.add(scan_id)
+            stderr = await execute_gitleaks(
+                cmd, float(timeout or settings.default_timeout), result
+            )
 
         result.completed_at = datetime.now()
 
-        # Read output file if exists
-        if output_file.exists():
-            output_content = output_file.read_text()
-            result.raw_output = output_content
-            result.findings = parse_gitleaks_json(output_content)
-        else:
-            # No findings
-            result.findings = []
-
-        # Generate stats
-        rules_triggered = {}
-        for finding in result.findings:
-            rule = finding.rule_id
-            rules_triggered[rule] = rules_triggered.get(rule, 0) + 1
-
-        files_with_secrets = set(f.file for f in result.findings if f.file)
-
-        result.stats = {
-            "total_findings": len(result.findings),
-            "unique_rules_triggered": len(rules_triggered),
-            "files_with_secrets": len(files_with_secrets),
-            "rules_breakdown": rules_triggered,
-        }
-
         result.status = "completed"
-        logger.info(f"Scan {scan_id} completed: {len(result.findings)} findings")
+        logger.info(f"Scan {scan_id} completed: {result.stats['total_findings']} findings")
 
-        if stderr:
-            stderr_text = stderr.decode()
-            if "error" in stderr_text.lower():
-                logger.warning(f"Scan {scan_id} warnings: {stderr_text}")
+        # Match on bytes so a quiet scan never decodes or lowercases stderr
+        if stderr and b"error" in stderr.lower():
+            logger.warning(f"Scan {scan_id} warnings: {stderr.decode(errors='replace')}")
 
     except asyncio.TimeoutError:
         result.status = "timeout"
@@ -219,6 +341,13 @@ async def run_gitleaks_scan(
         result.completed_at = datetime.now()
         logger.error(f"Scan {scan_id} timed out")
 
+    except asyncio.CancelledError:
+        result.status = "cancelled"
+        result.error = "Scan was cancelled"
+        result.completed_at = datetime.now()
+        logger.warning(f"Scan {scan_id} cancelled")
+        raise
+
     except Exception as e:
         result.status = "error"
         result.error = str(e)
@@ -228,69 +357,48 @@ async def run_gitleaks_scan(
     finally:
         active_scans.discard(scan_id)
         scan_results[scan_id] = result
+        scan_results.move_to_end(scan_id)
+        _evict_old_scans()
 
     return result
 
 
 async def scan_content(content: str, timeout: int | None = None) -> ScanResult:
     """Scan provided content for secrets."""
-    scan_id = str(uuid.uuid4())[:8]
+    scan_id = _new_scan_id()
 
-    result = ScanResult(
+    # All fields are produced locally, so skip pydantic validation
+    result = ScanResult.model_construct(
         scan_id=scan_id,
         target="<content>",
         scan_type="content",
         started_at=datetime.now(),
     )
     scan_results[scan_id] = result
-    active_scans.add(scan_id)
-
-    # Write content to temp file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    output_file = Path(settings.output_dir) / f"scan_{scan_id}.json"
 
     try:
+        # Content is piped straight into gitleaks, no temp file needed
         cmd = [
             "gitleaks",
-            "detect",
-            "--source", temp_path,
+            "stdin",
             "--report-format", "json",
-            "--report-path", str(output_file),
+            "--report-path", "-",
             "--exit-code", "0",
-            "--no-git",
         ]
 
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        await asyncio.wait_for(
-            process.communicate(),
-            timeout=float(timeout or settings.default_timeout),
-        )
+        # Wait for a free slot; held until gitleaks has exited
+        async with scan_slots:
+            active_scans.add(scan_id)
+            await execute_gitleaks(
+                cmd,
+                float(timeout or settings.default_timeout),
+                result,
+                stdin_data=content.encode(),
+                default_file=STDIN_FILE,
+            )
 
         result.completed_at = datetime.now()
 
-        if output_file.exists():
-            output_content = output_file.read_text()
-            result.raw_output = output_content
-            result.findings = parse_gitleaks_json(output_content)
-
-        rules_triggered = {}
-        for finding in result.findings:
-            rule = finding.rule_id
-            rules_triggered[rule] = rules_triggered.get(rule, 0) + 1
-
-        result.stats = {
-            "total_findings": len(result.findings),
-            "rules_breakdown": rules_triggered,
-        }
-
         result.status = "completed"
 
     except asyncio.TimeoutError:
@@ -298,6 +406,12 @@ async def scan_content(content: str, timeout: int | None = None) -> ScanResult:
         result.error = f"Scan timed out"
         result.completed_at = datetime.now()
 
+    except asyncio.CancelledError:
+        result.status = "cancelled"
+        result.error = "Scan was cancelled"
+        result.completed_at = datetime.now()
+        raise
+
     except Exception as e:
         result.status = "error"
         result.error = str(e)
@@ -306,16 +420,21 @@ async def scan_content(content: str, timeout: int | None = None) -> ScanResult:
     finally:
         active_scans.discard(scan_id)
         scan_results[scan_id] = result
-        # Clean up temp file
-        Path(temp_path).unlink(missing_ok=True)
+        scan_results.move_to_end(scan_id)
+        _evict_old_scans()
 
     return result
 
 
+def _dumps(obj: Any) -> str:
+    """Serialize a tool response as indented JSON; datetimes match isoformat()."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
 def format_scan_summary(result: ScanResult) -> dict[str, Any]:
     """Format scan result for response."""
     findings_summary = []
-    for finding in result.findings[:50]:  # Limit to 50 findings
+    for finding in itertools.islice(result.findings, MAX_SUMMARY_FINDINGS):
         findings_summary.append({
             "rule_id": finding.rule_id,
             "description": finding.description,
@@ -341,98 +460,102 @@ def format_scan_summary(result: ScanResult) -> dict[str, Any]:
 app = Server("gitleaks-mcp")
 
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List available tools."""
-    return [
-        Tool(
-            name="gitleaks_scan_repo",
-            description="Scan a git repository for secrets and credentials. "
-            "Analyzes commit history for leaked API keys, passwords, tokens, etc.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo_path": {
-                        "type": "string",
-                        "description": "Path to the git repository to scan",
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Scan timeout in seconds",
-                        "default": 300,
-                    },
+# Tool definitions are static, so build them once at import
+_TOOLS: list[Tool] = [
+    Tool(
+        name="gitleaks_scan_repo",
+        description="Scan a git repository for secrets and credentials. "
+        "Analyzes commit history for leaked API keys, passwords, tokens, etc.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo_path": {
+                    "type": "string",
+                    "description": "Path to the git repository to scan",
                 },
-                "required": ["repo_path"],
-            },
-        ),
-        Tool(
-            name="gitleaks_scan_dir",
-            description="Scan a directory for secrets without git history analysis. "
-            "Useful for scanning non-git directories or specific folders.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "dir_path": {
-                        "type": "string",
-                        "description": "Directory path to scan",
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Scan timeout in seconds",
-                        "default": 300,
-                    },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Scan timeout in seconds",
+                    "default": 300,
                 },
-                "required": ["dir_path"],
             },
-        ),
-        Tool(
-            name="gitleaks_detect",
-            description="Quick scan provided content (text/code) for secrets. "
-            "Useful for checking config files, environment variables, etc.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "content": {
-                        "type": "string",
-                        "description": "Text content to scan for secrets",
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Scan timeout in seconds",
-                        "default": 60,
-                    },
+            "required": ["repo_path"],
+        },
+    ),
+    Tool(
+        name="gitleaks_scan_dir",
+        description="Scan a directory for secrets without git history analysis. "
+        "Useful for scanning non-git directories or specific folders.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "dir_path": {
+                    "type": "string",
+                    "description": "Directory path to scan",
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Scan timeout in seconds",
+                    "default": 300,
                 },
-                "required": ["content"],
             },
-        ),
-        Tool(
-            name="get_scan_results",
-            description="Retrieve results from a previous scan by scan ID.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "scan_id": {
-                        "type": "string",
-                        "description": "Scan ID returned from a previous scan",
-                    },
-                    "include_raw": {
-                        "type": "boolean",
-                        "description": "Include raw gitleaks JSON output",
-                        "default": False,
-                    },
+            "required": ["dir_path"],
+        },
+    ),
+    Tool(
+        name="gitleaks_detect",
+        description="Quick scan provided content (text/code) for secrets. "
+        "Useful for checking config files, environment variables, etc.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "content": {
+                    "type": "string",
+                    "description": "Text content to scan for secrets",
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Scan timeout in seconds",
+                    "default": 60,
                 },
-                "required": ["scan_id"],
             },
-        ),
-        Tool(
-            name="list_active_scans",
-            description="List currently running scans.",
-            inputSchema={
-                "type": "object",
-                "properties": {},
+            "required": ["content"],
+        },
+    ),
+    Tool(
+        name="get_scan_results",
+        description="Retrieve results from a previous scan by scan ID.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "scan_id": {
+                    "type": "string",
+                    "description": "Scan ID returned from a previous scan",
+                },
+                "include_raw": {
+                    "type": "boolean",
+                    "description": "Include raw gitleaks JSON output",
+                    "default": False,
+                },
             },
-        ),
-    ]
+            "required": ["scan_id"],
+        },
+    ),
+    Tool(
+        name="list_active_scans",
+        description="List currently running scans.",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+        },
+    ),
+]
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List available tools."""
+    return _TOOLS
 
 
 @app.call_tool()
@@ -440,14 +563,6 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """Handle tool calls."""
     try:
         if name == "gitleaks_scan_repo":
-            if len(active_scans) >= settings.max_concurrent_scans:
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"Maximum concurrent scans ({settings.max_concurrent_scans}) reached.",
-                    )
-                ]
-
             repo_path = arguments["repo_path"]
             if not Path(repo_path).exists():
                 return [
@@ -472,19 +587,11 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             return [
                 TextContent(
                     type="text",
-                    text=json.dumps(format_scan_summary(result), indent=2),
+                    text=_dumps(format_scan_summary(result)),
                 )
             ]
 
         elif name == "gitleaks_scan_dir":
-            if len(active_scans) >= settings.max_concurrent_scans:
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"Maximum concurrent scans ({settings.max_concurrent_scans}) reached.",
-                    )
-                ]
-
             dir_path = arguments["dir_path"]
             if not Path(dir_path).exists():
                 return [
@@ -501,19 +608,11 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             return [
                 TextContent(
                     type="text",
-                    text=json.dumps(format_scan_summary(result), indent=2),
+                    text=_dumps(format_scan_summary(result)),
                 )
             ]
 
         elif name == "gitleaks_detect":
-            if len(active_scans) >= settings.max_concurrent_scans:
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"Maximum concurrent scans ({settings.max_concurrent_scans}) reached.",
-                    )
-                ]
-
             content = arguments["content"]
             if not content.strip():
                 return [
@@ -528,7 +627,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             return [
                 TextContent(
                     type="text",
-                    text=json.dumps(format_scan_summary(result), indent=2),
+                    text=_dumps(format_scan_summary(result)),
                 )
             ]
 
@@ -537,13 +636,14 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             result = scan_results.get(scan_id)
 
             if result:
+                scan_results.move_to_end(scan_id)
                 output = format_scan_summary(result)
                 if arguments.get("include_raw") and result.raw_output:
-                    output["raw_output"] = result.raw_output[:10000]
+                    output["raw_output"] = result.raw_output
                 return [
                     TextContent(
                         type="text",
-                        text=json.dumps(output, indent=2),
+                        text=_dumps(output),
                     )
                 ]
             else:
@@ -557,7 +657,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     "scan_id": scan_id,
                     "target": scan_results[scan_id].target,
                     "scan_type": scan_results[scan_id].scan_type,
-                    "started_at": scan_results[scan_id].started_at.isoformat(),
+                    "started_at": scan_results[scan_id].started_at,
                 }
                 for scan_id in active_scans
                 if scan_id in scan_results
@@ -566,13 +666,12 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             return [
                 TextContent(
                     type="text",
-                    text=json.dumps(
+                    text=_dumps(
                         {
                             "active_scans": active,
                             "count": len(active),
                             "max_concurrent": settings.max_concurrent_scans,
-                        },
-                        indent=2,
+                        }
                     ),
                 )
             ]
@@ -592,7 +691,7 @@ async def list_resources() -> list[Resource]:
 
     for scan_id, result in scan_results.items():
         if result.status == "completed":
-            finding_count = len(result.findings)
+            finding_count = result.stats.get("total_findings", 0)
             resources.append(
                 Resource(
                     uri=f"gitleaks://results/{scan_id}",
@@ -612,9 +711,9 @@ async def read_resource(uri: str) -> str:
         scan_id = uri.replace("gitleaks://results/", "")
         result = scan_results.get(scan_id)
         if result:
-            return json.dumps(format_scan_summary(result), indent=2)
+            return _dumps(format_scan_summary(result))
 
-    return json.dumps({"error": "Resource not found"})
+    return orjson.dumps({"error": "Resource not found"}).decode()
 
 
 async def main():
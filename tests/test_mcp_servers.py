@@ -7,8 +7,12 @@ Tests verify:
 3. Tools are properly defined with required fields
 """
 
+import asyncio
 import importlib.util
+import json
+import os
 import sys
+from datetime import datetime
 from pathlib import Path
 
 import pytest
@@ -208,3 +212,249 @@ class TestMCPWrappers:
         """Test that wrapper MCPs have a Dockerfile."""
         dockerfile_path = ROOT_DIR / category / mcp_name / "Dockerfile"
         assert dockerfile_path.exists(), f"Missing: {dockerfile_path}"
+
+
+FAKE_WAYBACKURLS = """#!/bin/sh
+read domain
+printf 'https://%s/app.js?v=1\\nhttps://%s/app.js?v=1\\nhttp://%s/a/b/\\n' "$domain" "$domain" "$domain"
+"""
+
+
+@pytest.fixture
+def waybackurls_server(tmp_path, monkeypatch):
+    """waybackurls-mcp with a stub waybackurls binary and a temp output dir."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "waybackurls"
+    stub.write_text(FAKE_WAYBACKURLS)
+    stub.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+
+    module = load_server_module("web-security", "waybackurls-mcp")
+    module.settings.output_dir = str(tmp_path / "out")
+    Path(module.settings.output_dir).mkdir()
+    return module
+
+
+class TestWaybackurlsFetchHistory:
+    """Fetch bookkeeping in waybackurls-mcp."""
+
+    @pytest.mark.asyncio
+    async def test_evicted_fetch_reloads_from_metadata(self, waybackurls_server):
+        server = waybackurls_server
+        server.settings.max_results = 1
+
+        first = await server.run_waybackurls("example.com")
+        await server.run_waybackurls("example.org")
+        assert first.fetch_id not in server.fetch_results
+
+        reloaded = await server.get_fetch(first.fetch_id)
+        assert reloaded is not None
+        assert reloaded.domain == "example.com"
+        assert reloaded.status == "completed"
+        assert reloaded.total_urls == first.total_urls
+        assert reloaded.raw_count == first.raw_count
+
+    @pytest.mark.asyncio
+    async def test_fetch_without_metadata_is_not_reloaded(self, waybackurls_server):
+        server = waybackurls_server
+        server._output_path("deadbeef").write_text("https://example.com/\n")
+        assert await server.get_fetch("deadbeef") is None
+
+    @pytest.mark.asyncio
+    async def test_duplicate_urls_are_dropped_while_streaming(self, waybackurls_server):
+        server = waybackurls_server
+
+        result = await server.run_waybackurls("example.com")
+        assert result.status == "completed"
+        assert result.raw_count == 3
+        assert result.total_urls == 2
+        lines = server._output_path(result.fetch_id).read_text().splitlines()
+        assert lines == ["https://example.com/app.js?v=1", "http://example.com/a/b/"]
+
+        raw = await server.run_waybackurls("example.com", dedup=False)
+        assert raw.total_urls == raw.raw_count == 3
+
+    @pytest.mark.asyncio
+    async def test_stats_are_computed_only_when_requested(self, waybackurls_server):
+        server = waybackurls_server
+        result = await server.run_waybackurls("example.com")
+        assert result.stats is None
+
+        summary = await server.format_fetch_summary(result, include_stats=False)
+        assert summary["stats"] is None
+        assert result.stats is None
+
+        stats = await server.get_stats(result)
+        assert stats["total"] == 2
+        assert stats["by_extension"] == {"js": 1}
+        assert stats["by_subdomain"] == {"example.com": 2}
+        assert stats["by_path_depth"] == {1: 1, 2: 1}
+        assert stats["protocols"] == {"http": 1, "https": 1}
+        assert stats["with_params"] == 1
+        assert result.stats is stats
+
+    def test_eviction_keeps_running_fetches(self, waybackurls_server):
+        server = waybackurls_server
+        server.settings.max_results = 2
+        for fetch_id, status in [("a1", "completed"), ("b2", "running"), ("c3", "failed"), ("d4", "completed")]:
+            server.fetch_results[fetch_id] = server.FetchResult(
+                fetch_id=fetch_id, domain="example.com", started_at=datetime.now(), status=status
+            )
+        server._evict_old_fetches()
+        assert list(server.fetch_results) == ["b2", "d4"]
+
+
+def _gitleaks_result(server, scan_id: str = "scan", status: str = "running"):
+    return server.ScanResult.model_construct(
+        scan_id=scan_id, target="/src", scan_type="dir", started_at=datetime.now(), status=status
+    )
+
+
+def _stream_of(data: bytes, chunk_size: int = 1000) -> asyncio.StreamReader:
+    stream = asyncio.StreamReader()
+    for i in range(0, len(data), chunk_size):
+        stream.feed_data(data[i:i + chunk_size])
+    stream.feed_eof()
+    return stream
+
+
+class TestGitleaksReport:
+    """Streaming report parsing and scan history in gitleaks-mcp."""
+
+    @pytest.mark.asyncio
+    async def test_report_keeps_capped_rows_and_counts_every_finding(self):
+        server = load_server_module("secrets", "gitleaks-mcp")
+        items = [
+            {"RuleID": f"rule-{i % 3}", "File": f"src/f{i % 7}.py", "Secret": "abcdefgh", "StartLine": i}
+            for i in range(120)
+        ]
+        result = _gitleaks_result(server)
+
+        await server.read_gitleaks_report(_stream_of(json.dumps(items).encode()), result)
+
+        assert len(result.findings) == server.MAX_SUMMARY_FINDINGS
+        assert [f.line for f in result.findings] == list(range(server.MAX_SUMMARY_FINDINGS))
+        assert result.findings[0].secret == "abcd****"
+        assert result.stats == {
+            "total_findings": 120,
+            "unique_rules_triggered": 3,
+            "files_with_secrets": 7,
+            "rules_breakdown": {"rule-0": 40, "rule-1": 40, "rule-2": 40},
+        }
+
+    @pytest.mark.asyncio
+    async def test_report_without_file_uses_default_file(self):
+        server = load_server_module("secrets", "gitleaks-mcp")
+        result = _gitleaks_result(server)
+        report = json.dumps([{"RuleID": "aws", "Secret": "AKIA0000"}]).encode()
+
+        await server.read_gitleaks_report(_stream_of(report), result, default_file="<stdin>")
+
+        assert result.findings[0].file == "<stdin>"
+        assert result.stats["files_with_secrets"] == 1
+
+    @pytest.mark.asyncio
+    async def test_malformed_report_is_drained(self):
+        server = load_server_module("secrets", "gitleaks-mcp")
+        result = _gitleaks_result(server)
+        stream = _stream_of(b"[{not json" + b" " * 200000)
+
+        await server.read_gitleaks_report(stream, result)
+
+        assert stream.at_eof()
+        assert result.findings == []
+        assert result.stats["total_findings"] == 0
+        assert result.raw_output.startswith("[{not json")
+
+    def test_eviction_keeps_running_scans(self):
+        server = load_server_module("secrets", "gitleaks-mcp")
+        server.settings.max_results = 2
+        for scan_id, status in [("a", "completed"), ("b", "running"), ("c", "timeout"), ("d", "completed")]:
+            server.scan_results[scan_id] = _gitleaks_result(server, scan_id, status)
+        server._evict_old_scans()
+        assert list(server.scan_results) == ["b", "d"]
+
+
+class TestSolazyRunHistory:
+    """Run history bounds in solazy-mcp."""
+
+    def test_eviction_keeps_active_runs_and_releases_previews(self, tmp_path):
+        server = load_server_module("blockchain", "solazy-mcp")
+        server.settings.max_history = 2
+        runs = [server._new_run("sast", ["sol-azy"], tmp_path) for _ in range(4)]
+        server.active_runs.add(runs[1].run_id)
+        server._cache_artifact_previews(runs[0], {"a.out": "x" * 10}, 10)
+        assert server._cached_preview_chars == 10
+
+        server._evict_old_runs()
+
+        assert list(server.run_results) == [runs[1].run_id, runs[3].run_id]
+        assert server._cached_preview_chars == 0
+
+    @pytest.mark.asyncio
+    async def test_cached_previews_stay_within_global_budget(self, tmp_path):
+        server = load_server_module("blockchain", "solazy-mcp")
+        server.settings.max_cached_previews = 25
+        runs = []
+        for i in range(3):
+            artifact = tmp_path / f"{i}.out"
+            artifact.write_text("x" * 10)
+            run = server._new_run("sast", ["sol-azy"], tmp_path)
+            run.status = "completed"
+            run.artifacts = [server.Artifact(path=str(artifact), size=10)]
+            await server._artifact_previews(run)
+            runs.append(run)
+
+        assert [run.artifact_previews is not None for run in runs] == [False, True, True]
+        assert server._cached_preview_chars == 20
+
+
+class TestMedusaHelpers:
+    """Argument parsing and config caching in medusa-mcp."""
+
+    @pytest.mark.parametrize(
+        "arguments",
+        [
+            {},
+            {"workers": 4, "target-contracts": ["A", "B"], "fail-fast": True, "timeout": 60},
+            {"compilation_target": "src/", "seq_len": 50, "verbosity": 2},
+            {"workers": "4", "test-limit": "100"},
+            {"senders": ["0x10000"], "rpc-url": "http://localhost:8545", "no-color": True},
+        ],
+    )
+    def test_parse_fuzz_args_matches_full_validation(self, arguments):
+        server = load_server_module("blockchain", "medusa-mcp")
+        fast = server._parse_fuzz_args(arguments)
+        full = server.FuzzArguments.model_validate(arguments)
+        assert fast.model_dump() == full.model_dump()
+        assert fast.to_flags() == full.to_flags()
+
+    def test_config_cache_follows_mtime_and_size(self, tmp_path):
+        server = load_server_module("blockchain", "medusa-mcp")
+        cfg = tmp_path / "medusa.json"
+        cfg.write_text('{"fuzzing": {"workers": 1}}')
+        _, data = server._load_cfg(cfg)
+        assert data == {"fuzzing": {"workers": 1}}
+
+        # Same size and mtime: served from the cache without re-reading
+        st = cfg.stat()
+        cfg.write_text('{"fuzzing": {"workers": 2}}')
+        os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert server._load_cfg(cfg)[1] is data
+
+        # A new mtime invalidates the entry
+        os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert server._load_cfg(cfg)[1] == {"fuzzing": {"workers": 2}}
+
+        # So does a size change, even with the mtime put back
+        cfg.write_text('{"fuzzing": {"workers": 30}}')
+        os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert server._load_cfg(cfg)[1] == {"fuzzing": {"workers": 30}}
+
+    def test_deep_update_does_not_alias_input(self):
+        server = load_server_module("blockchain", "medusa-mcp")
+        updates = {"fuzzing": {"workers": 4, "corpus": {"dir": "c"}}}
+        merged = server._deep_update({"fuzzing": {"timeout": 5}}, updates)
+        assert merged == {"fuzzing": {"timeout": 5, "workers": 4, "corpus": {"dir": "c"}}}
+        assert merged["fuzzing"]["corpus"] is not updates["fuzzing"]["corpus"]
@@ -12,14 +12,20 @@ Tools:
 """
 
 import asyncio
+import functools
+import itertools
 import json
 import logging
-import uuid
+import os
+import string
+from collections import Counter, OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 from urllib.parse import urlparse
 
+import orjson
+from ada_url import parse_url
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -37,6 +43,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger("waybackurls-mcp")
 
+_URL_ATTRIBUTES = ("protocol", "host", "pathname", "search")
+_PROTOCOLS = {"http:": "http", "https:": "https"}
+# Distinct URLs whose parse is remembered during one analyze_urls call
+PARSE_MEMO_SIZE = 4096
+
+# Longest single line accepted from waybackurls stdout
+STREAM_LINE_LIMIT = 1024 * 1024
+# Buffered URL bytes flushed to the output file per worker-thread write
+WRITE_BATCH_BYTES = 256 * 1024
+
 
 class Settings(BaseSettings):
     """Server configuration from environment variables."""
@@ -46,6 +62,7 @@ class Settings(BaseSettings):
     output_dir: str = Field(default="/app/output", alias="WAYBACKURLS_OUTPUT_DIR")
     default_timeout: int = Field(default=300, alias="WAYBACKURLS_TIMEOUT")
     max_concurrent_fetches: int = Field(default=3, alias="WAYBACKURLS_MAX_CONCURRENT")
+    max_results: int = Field(default=64, alias="WAYBACKURLS_MAX_RESULTS")
 
 
 settings = Settings()
@@ -59,21 +76,89 @@ class FetchResult(BaseModel):
     started_at: datetime
     completed_at: datetime | None = None
     status: str = "running"
-    urls: list[str] = []
     total_urls: int = 0
-    stats: dict[str, Any] = {}
+    raw_count: int = 0
+    # Computed on first request by get_stats()
+    stats: dict[str, Any] | None = None
     error: str | None = None
 
 
-# In-memory storage for fetch results
-fetch_results: dict[str, FetchResult] = {}
+# In-memory storage for fetch results, least recently used first;
+# trimmed to settings.max_results by _evict_old_fetches.
+fetch_results: OrderedDict[str, FetchResult] = OrderedDict()
 active_fetches: set[str] = set()
 
+# Fetches beyond the concurrency limit queue here instead of being rejected
+fetch_slots = asyncio.Semaphore(settings.max_concurrent_fetches)
+
+# Bumped whenever a fetch starts or finishes; keys the cached listings below
+_fetches_version = 0
+_active_cache: tuple[int, str] | None = None
+_resources_cache: tuple[int, list[Resource]] | None = None
+
+
+def _fetches_changed() -> None:
+    """Invalidate cached active-fetch and resource listings."""
+    global _fetches_version
+    _fetches_version += 1
+
+
+def _evict_old_fetches() -> None:
+    """Drop the least recently used finished fetches once history exceeds settings.max_results.
+
+    Evicted fetches stay on disk (URL list plus metadata sidecar) and are
+    reloaded by get_fetch().
+    """
+    excess = len(fetch_results) - settings.max_results
+    if excess <= 0:
+        return
+    stale: list[str] = []
+    for fetch_id, result in fetch_results.items():
+        # Running fetches are still awaited by their callers
+        if result.status != "running":
+            stale.append(fetch_id)
+            if len(stale) >= excess:
+                break
+    for fetch_id in stale:
+        del fetch_results[fetch_id]
+    if stale:
+        _fetches_changed()
+
+
+def _output_path(fetch_id: str) -> Path:
+    return Path(settings.output_dir) / f"wayback_{fetch_id}.txt"
 
-def analyze_urls(urls: list[str]) -> dict[str, Any]:
+
+def _meta_path(fetch_id: str) -> Path:
+    return Path(settings.output_dir) / f"wayback_{fetch_id}.meta.json"
+
+
+def _write_meta(result: FetchResult) -> None:
+    """Record a finished fetch's status, domain and counts next to its URL list."""
+    path = _meta_path(result.fetch_id)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(result.model_dump_json(exclude={"stats"}))
+    os.replace(tmp_path, path)
+
+
+def _parse(url: str) -> dict[str, str]:
+    """Parse a URL into the attributes analyze_urls needs."""
+    return parse_url(url, attributes=_URL_ATTRIBUTES)
+
+
+@functools.lru_cache(maxsize=4096)
+def _clean_domain(domain: str) -> str:
+    """Normalize a user-supplied domain, stripping any URL scheme."""
+    domain = domain.strip().lower()
+    if domain.startswith(("http://", "https://")):
+        domain = urlparse(domain).netloc
+    return domain
+
+
+def analyze_urls(urls: Iterable[str]) -> dict[str, Any]:
     """Analyze fetched URLs and generate statistics."""
     stats = {
-        "total": len(urls),
+        "total": 0,
         "by_extension": {},
         "by_subdomain": {},
         "by_path_depth": {},
@@ -81,70 +166,116 @@ def analyze_urls(urls: list[str]) -> dict[str, Any]:
         "with_params": 0,
     }
 
+    # Memo scoped to this call, so nothing outlives the analysis; it pays
+    # off on dedup=False fetches where the same URL repeats many times
+    parse = functools.lru_cache(maxsize=PARSE_MEMO_SIZE)(_parse)
+
+    protocols = stats["protocols"]
+    hosts: list[str] = []
+    extensions: list[str] = []
+    depths: list[int] = []
+
+    total = 0
     for url in urls:
+        total += 1
         try:
-            parsed = urlparse(url)
-            
-            # Protocol stats
-            if parsed.scheme == "http":
-                stats["protocols"]["http"] += 1
-            elif parsed.scheme == "https":
-                stats["protocols"]["https"] += 1
-            
-            # Subdomain stats
-            domain = parsed.netloc
-            stats["by_subdomain"][domain] = stats["by_subdomain"].get(domain, 0) + 1
-            
-            # Extension stats
-            path = parsed.path
-            if "." in path:
-                ext = path.split(".")[-1].split("?")[0].split("#")[0].lower()
-                if ext and len(ext) <= 5:
-                    stats["by_extension"][ext] = stats["by_extension"].get(ext, 0) + 1
-            
-            # Path depth
-            depth = len([p for p in path.split("/") if p])
-            stats["by_path_depth"][depth] = stats["by_path_depth"].get(depth, 0) + 1
-            
-            # Parameters
-            if parsed.query:
-                stats["with_params"] += 1
-                
-        except Exception as e:
+            parsed = parse(url)
+        except ValueError as e:
             logger.debug(f"Error analyzing URL {url}: {e}")
             continue
 
-    # Sort and limit top entries
-    stats["by_extension"] = dict(sorted(
-        stats["by_extension"].items(), 
-        key=lambda x: x[1], 
-        reverse=True
-    )[:20])
-    
-    stats["by_subdomain"] = dict(sorted(
-        stats["by_subdomain"].items(), 
-        key=lambda x: x[1], 
-        reverse=True
-    )[:20])
-    
-    stats["by_path_depth"] = dict(sorted(
-        stats["by_path_depth"].items(), 
-        key=lambda x: x[0]
-    ))
+        # Protocol stats
+        protocol = _PROTOCOLS.get(parsed["protocol"])
+        if protocol:
+            protocols[protocol] += 1
+
+        # Subdomain stats
+        hosts.append(parsed["host"])
+
+        # Extension stats
+        path = parsed["pathname"]
+        dot = path.rfind(".")
+        if dot != -1:
+            ext = path[dot + 1:].lower()
+            if ext and len(ext) <= 5:
+                extensions.append(ext)
+
+        # Path depth: non-empty segments, counted without splitting unless
+        # the path has empty segments in the middle
+        trimmed = path.strip("/")
+        if "//" in trimmed:
+            depths.append(len([p for p in trimmed.split("/") if p]))
+        else:
+            depths.append(trimmed.count("/") + 1 if trimmed else 0)
+
+        # Parameters
+        if parsed["search"]:
+            stats["with_params"] += 1
+
+    stats["total"] = total
+
+    # Count in bulk, then sort and limit top entries
+    stats["by_extension"] = dict(Counter(extensions).most_common(20))
+    stats["by_subdomain"] = dict(Counter(hosts).most_common(20))
+    stats["by_path_depth"] = dict(sorted(Counter(depths).items()))
 
     return stats
 
 
+async def read_wayback_output(
+    stream: asyncio.StreamReader, output_file: Path, dedup: bool = True
+) -> tuple[int, int]:
+    """Copy URLs from waybackurls stdout to disk line by line.
+
+    Returns the number of URLs written and the number seen, including
+    duplicates skipped by dedup.
+    """
+    seen: set[bytes] = set()
+    url_count = 0
+    raw_count = 0
+    pending = bytearray()
+    f = await asyncio.to_thread(output_file.open, "wb")
+    try:
+        async for raw in stream:
+            line = raw.strip()
+            if not line:
+                continue
+            raw_count += 1
+            if dedup:
+                if line in seen:
+                    continue
+                seen.add(line)
+            pending += line
+            pending += b"\n"
+            url_count += 1
+            if len(pending) >= WRITE_BATCH_BYTES:
+                await asyncio.to_thread(f.write, pending)
+                pending.clear()
+        if pending:
+            await asyncio.to_thread(f.write, pending)
+    finally:
+        await asyncio.to_thread(f.close)
+    return url_count, raw_count
+
+
 async def run_waybackurls(
     domain: str,
     get_subs: bool = False,
     no_subs: bool = False,
     dates: bool = False,
     timeout: int | None = None,
+    dedup: bool = True,
 ) -> FetchResult:
     """Execute waybackurls asynchronously."""
-    fetch_id = str(uuid.uuid4())[:8]
-    output_file = Path(settings.output_dir) / f"wayback_{fetch_id}.txt"
+    fetch_id = os.urandom(4).hex()
+    # Evicted fetches still own their output file
+    while (
+        fetch_id in fetch_results
+        or _output_path(fetch_id).exists()
+        or _meta_path(fetch_id).exists()
+    ):
+        fetch_id = os.urandom(4).hex()
+    output_file = _output_path(fetch_id)
 
     result = FetchResult(
         fetch_id=fetch_id,
@@ -152,7 +283,6 @@ async def run_waybackurls(
         started_at=datetime.now(),
     )
     fetch_results[fetch_id] = result
-    active_fetches.add(fetch_id)
 
     # Build waybackurls command
     # waybackurls accepts domains on stdin
@@ -169,35 +299,45 @@ async def run_waybackurls(
     logger.debug(f"Command: echo {domain} | {' '.join(cmd)}")
 
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        # Wait for a free slot; held until waybackurls has exited
+        async with fetch_slots:
+            active_fetches.add(fetch_id)
+            _fetches_changed()
+
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=STREAM_LINE_LIMIT,
+            )
 
-        # Send domain to stdin
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(input=domain.encode()),
-            timeout=float(timeout or settings.default_timeout),
-        )
+            try:
+                # Send domain to stdin
+                process.stdin.write(domain.encode())
+                process.stdin.close()
+
+                (url_count, raw_count), stderr, _ = await asyncio.wait_for(
+                    asyncio.gather(
+                        read_wayback_output(process.stdout, output_file, dedup),
+                        process.stderr.read(),
+                        process.wait(),
+                    ),
+                    timeout=float(timeout or settings.default_timeout),
+                )
+            finally:
+                # However the read ended (timeout, cancel, overlong line, write
+                # error), stop waybackurls before the slot is freed
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
 
         result.completed_at = datetime.now()
+        # URLs are served from output_file; stats are computed on request
+        result.total_urls = url_count
+        result.raw_count = raw_count
 
-        # Parse output
-        stdout_text = stdout.decode()
-        if stdout_text.strip():
-            urls = [line.strip() for line in stdout_text.split("\n") if line.strip()]
-            result.urls = urls
-            result.total_urls = len(urls)
-            
-            # Save to file
-            output_file.write_text("\n".join(urls))
-            
-            # Generate statistics
-            result.stats = analyze_urls(urls)
-
-        stderr_text = stderr.decode()
+        stderr_text = stderr.decode(errors="replace")
         if stderr_text:
             logger.debug(f"Waybackurls stderr: {stderr_text}")
 
@@ -218,6 +358,13 @@ async def run_waybackurls(
         result.completed_at = datetime.now()
         logger.error(f"Fetch {fetch_id} timed out")
 
+    except asyncio.CancelledError:
+        result.status = "cancelled"
+        result.error = "Fetch was cancelled"
+        result.completed_at = datetime.now()
+        logger.warning(f"Fetch {fetch_id} cancelled")
+        raise
+
     except Exception as e:
         result.status = "error"
         result.error = str(e)
@@ -227,31 +374,127 @@ async def run_waybackurls(
     finally:
         active_fetches.discard(fetch_id)
         fetch_results[fetch_id] = result
+        fetch_results.move_to_end(fetch_id)
+        _fetches_changed()
+        # Without metadata an evicted fetch cannot be reloaded faithfully
+        try:
+            await asyncio.to_thread(_write_meta, result)
+        except OSError as e:
+            logger.warning(f"Could not save metadata for fetch {fetch_id}: {e}")
+        _evict_old_fetches()
+
+    return result
 
+
+async def get_fetch(fetch_id: str) -> FetchResult | None:
+    """Look up a fetch, reloading it from its metadata sidecar if it was evicted."""
+    result = fetch_results.get(fetch_id)
+    if result:
+        fetch_results.move_to_end(fetch_id)
+        return result
+
+    # Fetch IDs are hex; anything else cannot name an output file
+    if not fetch_id or not all(c in string.hexdigits for c in fetch_id):
+        return None
+    try:
+        meta = await asyncio.to_thread(_meta_path(fetch_id).read_bytes)
+        result = FetchResult.model_validate_json(meta)
+    except (OSError, ValueError):
+        return None
+
+    fetch_results[fetch_id] = result
+    _fetches_changed()
+    _evict_old_fetches()
     return result
 
 
-def format_fetch_summary(result: FetchResult, include_urls: bool = False, limit: int = 100) -> dict[str, Any]:
+def _analyze_output(fetch_id: str) -> dict[str, Any]:
+    # Stream the file: archived URLs are not always valid UTF-8
+    try:
+        with _output_path(fetch_id).open(encoding="utf-8", errors="replace", newline="\n") as f:
+            return analyze_urls(line.rstrip("\n") for line in f)
+    except FileNotFoundError:
+        return {}
+
+
+async def get_stats(result: FetchResult) -> dict[str, Any]:
+    """Return a fetch's URL statistics, analyzing its output file on first use."""
+    if result.stats is None:
+        # Partial output of a timed-out fetch was never counted; don't analyze it
+        if result.total_urls:
+            result.stats = await asyncio.to_thread(_analyze_output, result.fetch_id)
+        else:
+            result.stats = {}
+    return result.stats
+
+
+def read_url_head(fetch_id: str, limit: int) -> list[str]:
+    """Read the first `limit` URLs of a fetch from its output file."""
+    try:
+        with _output_path(fetch_id).open("rb") as f:
+            return [line.rstrip(b"\n").decode(errors="replace") for line in itertools.islice(f, max(limit, 0))]
+    except FileNotFoundError:
+        return []
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool response as indented JSON; datetimes match isoformat()."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
+async def format_fetch_summary(
+    result: FetchResult, include_urls: bool = False, limit: int = 100, include_stats: bool = True
+) -> dict[str, Any]:
     """Format fetch result for response."""
     summary = {
         "fetch_id": result.fetch_id,
         "domain": result.domain,
         "status": result.status,
         "total_urls": result.total_urls,
-        "started_at": result.started_at.isoformat(),
-        "completed_at": result.completed_at.isoformat() if result.completed_at else None,
-        "stats": result.stats,
+        "raw_count": result.raw_count,
+        "started_at": result.started_at,
+        "completed_at": result.completed_at,
+        "stats": await get_stats(result) if include_stats else None,
         "error": result.error,
     }
     
     if include_urls:
-        summary["urls"] = result.urls[:limit]
-        if len(result.urls) > limit:
-            summary["urls_truncated"] = f"Showing {limit} of {len(result.urls)} URLs"
+        # Partial output of a timed-out fetch was never counted; don't show it
+        summary["urls"] = await asyncio.to_thread(
+            read_url_head, result.fetch_id, min(limit, result.total_urls)
+        )
+        if result.total_urls > limit:
+            summary["urls_truncated"] = f"Showing {limit} of {result.total_urls} URLs"
     
     return summary
 
 
+def list_active_text() -> str:
+    """Serialize the running fetches, reusing the last result until they change."""
+    global _active_cache
+    if _active_cache is not None and _active_cache[0] == _fetches_version:
+        return _active_cache[1]
+
+    active = [
+        {
+            "fetch_id": fetch_id,
+            "domain": fetch_results[fetch_id].domain,
+            "started_at": fetch_results[fetch_id].started_at,
+        }
+        for fetch_id in active_fetches
+        if fetch_id in fetch_results
+    ]
+    text = _dumps(
+        {
+            "active_fetches": active,
+            "count": len(active),
+            "max_concurrent": settings.max_concurrent_fetches,
+        }
+    )
+    _active_cache = (_fetches_version, text)
+    return text
+
+
 # Create MCP server
 app = Server("waybackurls-mcp")
 
@@ -286,11 +529,21 @@ async def list_tools() -> list[Tool]:
                         "description": "Show timestamps for when URLs were archived",
                         "default": False,
                     },
+                    "dedup": {
+                        "type": "boolean",
+                        "description": "Drop duplicate URLs from the results (default: true)",
+                        "default": True,
+                    },
                     "include_urls": {
                         "type": "boolean",
                         "description": "Include the actual URLs in the response (default: true)",
                         "default": True,
                     },
+                    "include_stats": {
+                        "type": "boolean",
+                        "description": "Include extension/subdomain/path statistics (default: true)",
+                        "default": True,
+                    },
                     "limit": {
                         "type": "integer",
                         "description": "Maximum number of URLs to return in response (default: 100)",
@@ -320,6 +573,11 @@ async def list_tools() -> list[Tool]:
                         "description": "Include the actual URLs in the response",
                         "default": True,
                     },
+                    "include_stats": {
+                        "type": "boolean",
+                        "description": "Include extension/subdomain/path statistics (default: true)",
+                        "default": True,
+                    },
                     "limit": {
                         "type": "integer",
                         "description": "Maximum number of URLs to return",
@@ -345,20 +603,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """Handle tool calls."""
     try:
         if name == "fetch_wayback_urls":
-            if len(active_fetches) >= settings.max_concurrent_fetches:
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"Maximum concurrent fetches ({settings.max_concurrent_fetches}) reached. "
-                        f"Please wait for active fetches to complete.",
-                    )
-                ]
-
-            domain = arguments["domain"]
-            # Clean domain input
-            domain = domain.strip().lower()
-            if domain.startswith("http://") or domain.startswith("https://"):
-                domain = urlparse(domain).netloc
+            domain = _clean_domain(arguments["domain"])
 
             result = await run_waybackurls(
                 domain=domain,
@@ -366,37 +611,38 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                 no_subs=arguments.get("no_subs", False),
                 dates=arguments.get("dates", False),
                 timeout=arguments.get("timeout"),
+                dedup=arguments.get("dedup", True),
             )
 
             return [
                 TextContent(
                     type="text",
-                    text=json.dumps(
-                        format_fetch_summary(
+                    text=_dumps(
+                        await format_fetch_summary(
                             result,
                             include_urls=arguments.get("include_urls", True),
                             limit=arguments.get("limit", 100),
-                        ),
-                        indent=2,
+                            include_stats=arguments.get("include_stats", True),
+                        )
                     ),
                 )
             ]
 
         elif name == "get_fetch_results":
             fetch_id = arguments["fetch_id"]
-            result = fetch_results.get(fetch_id)
+            result = await get_fetch(fetch_id)
 
             if result:
                 return [
                     TextContent(
                         type="text",
-                        text=json.dumps(
-                            format_fetch_summary(
+                        text=_dumps(
+                            await format_fetch_summary(
                                 result,
                                 include_urls=arguments.get("include_urls", True),
                                 limit=arguments.get("limit", 100),
-                            ),
-                            indent=2,
+                                include_stats=arguments.get("include_stats", True),
+                            )
                         ),
                     )
                 ]
@@ -406,29 +652,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                 ]
 
         elif name == "list_active_fetches":
-            active = [
-                {
-                    "fetch_id": fetch_id,
-                    "domain": fetch_results[fetch_id].domain,
-                    "started_at": fetch_results[fetch_id].started_at.isoformat(),
-                }
-                for fetch_id in active_fetches
-                if fetch_id in fetch_results
-            ]
-
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps(
-                        {
-                            "active_fetches": active,
-                            "count": len(active),
-                            "max_concurrent": settings.max_concurrent_fetches,
-                        },
-                        indent=2,
-                    ),
-                )
-            ]
+            return [TextContent(type="text", text=list_active_text())]
 
         else:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
@@ -441,6 +665,10 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
 @app.list_resources()
 async def list_resources() -> list[Resource]:
     """List available resources."""
+    global _resources_cache
+    if _resources_cache is not None and _resources_cache[0] == _fetches_version:
+        return _resources_cache[1]
+
     resources = []
 
     for fetch_id, result in fetch_results.items():
@@ -454,6 +682,7 @@ async def list_resources() -> list[Resource]:
                 )
             )
 
+    _resources_cache = (_fetches_version, resources)
     return resources
 
 
@@ -462,9 +691,13 @@ async def read_resource(uri: str) -> str:
     """Read a resource."""
     if uri.startswith("waybackurls://results/"):
         fetch_id = uri.replace("waybackurls://results/", "")
-        result = fetch_results.get(fetch_id)
+        result = await get_fetch(fetch_id)
         if result:
-            return "\n".join(result.urls)
+            try:
+                data = await asyncio.to_thread(_output_path(fetch_id).read_bytes)
+            except FileNotFoundError:
+                return ""
+            return data.decode(errors="replace").removesuffix("\n")
 
     return json.dumps({"error": "Resource not found"})
 